@@ -16,6 +16,8 @@ contract BAIMMiner is Ownable, ReentrancyGuard {
     event SolutionSubmitted(uint256 indexed challengeId, address indexed solver);
     event ChallengeSolved(uint256 indexed challengeId, address indexed solver, string answer);
     event RewardClaimed(address indexed user, uint256 amount);
+    event ChallengeBatchPosted(uint256 indexed batchId, bytes32 root, uint256 count);
+    event BatchChallengeSolved(uint256 indexed batchId, bytes32 indexed leaf, address indexed solver, string answer);
     
     // 状态变量
     uint256 public totalMined;
@@ -38,6 +40,21 @@ contract BAIMMiner is Ownable, ReentrancyGuard {
     }
     
     mapping(uint256 => Challenge) public challenges;
+    
+    // 批量挑战: 一个 Merkle 根承诺一批挑战记录
+    struct ChallengeBatch {
+        bytes32 root;
+        uint256 count;
+        uint256 reward;     // 每道题的奖励
+        uint256 timestamp;
+    }
+    
+    // 挑战记录中答案承诺的位置 (scripts/challenge_record.py RECORD_HEADER "<BBBHHH32s")
+    uint256 private constant RECORD_COMMITMENT_OFFSET = 9;
+    
+    uint256 public batchCount;
+    mapping(uint256 => ChallengeBatch) public challengeBatches;
+    mapping(uint256 => mapping(bytes32 => bool)) public batchLeafSolved;
     mapping(address => uint256) public lastSolveTime;
     mapping(address => uint256) public totalRewards;
     
@@ -71,6 +88,87 @@ contract BAIMMiner is Ownable, ReentrancyGuard {
         return challengeCount;
     }
     
+    // 批量发布挑战 (一笔交易发布一整批)
+    function postChallengeBatch(bytes32 _root, uint256 _count) external onlyOwner returns (uint256) {
+        require(_count > 0, "Empty batch");
+        batchCount++;
+        challengeBatches[batchCount] = ChallengeBatch({
+            root: _root,
+            count: _count,
+            reward: tokensPerChallenge,
+            timestamp: block.timestamp
+        });
+        
+        emit ChallengeBatchPosted(batchCount, _root, _count);
+        return batchCount;
+    }
+    
+    // 验证挑战属于某一批次
+    // 叶子 = sha256(0x00 || 编码后的挑战记录), 节点 = sha256(0x01 || 左 || 右); _flags 第 i 位为 1 表示第 i 个兄弟节点在左侧
+    function verifyChallengeInclusion(
+        uint256 _batchId,
+        bytes calldata _record,
+        bytes32[] calldata _proof,
+        uint256 _flags
+    ) public view returns (bool) {
+        bytes32 node = sha256(abi.encodePacked(bytes1(0x00), _record));
+        for (uint256 i = 0; i < _proof.length; i++) {
+            if ((_flags >> i) & 1 == 1) {
+                node = sha256(abi.encodePacked(bytes1(0x01), _proof[i], node));
+            } else {
+                node = sha256(abi.encodePacked(bytes1(0x01), node, _proof[i]));
+            }
+        }
+        return node == challengeBatches[_batchId].root;
+    }
+    
+    // 提交批次中某道题的答案
+    // 答案承诺为 sha256(盐 || 答案), 盐值由出题方在答案通过 API 校验后下发 (与 mineData 相同的流程)
+    function submitBatchSolution(
+        uint256 _batchId,
+        bytes calldata _record,
+        bytes32[] calldata _proof,
+        uint256 _flags,
+        string calldata _answer,
+        bytes16 _salt
+    ) external nonReentrant {
+        ChallengeBatch storage batch = challengeBatches[_batchId];
+        
+        require(batch.count > 0, "Batch not found");
+        require(_record.length >= RECORD_COMMITMENT_OFFSET + 32, "Invalid record");
+        require(verifyChallengeInclusion(_batchId, _record, _proof, _flags), "Not in batch");
+        
+        bytes32 leaf = sha256(abi.encodePacked(bytes1(0x00), _record));
+        require(!batchLeafSolved[_batchId][leaf], "Already solved");
+        require(
+            block.timestamp >= lastSolveTime[msg.sender] + cooldown,
+            "Cooldown not finished"
+        );
+        
+        // 验证答案
+        bytes32 commitment;
+        uint256 offset = RECORD_COMMITMENT_OFFSET;
+        assembly {
+            commitment := calldataload(add(_record.offset, offset))
+        }
+        require(sha256(abi.encodePacked(_salt, _answer)) == commitment, "Wrong answer");
+        
+        // 标记为已解决
+        batchLeafSolved[_batchId][leaf] = true;
+        
+        // 更新用户状态
+        lastSolveTime[msg.sender] = block.timestamp;
+        totalRewards[msg.sender] += batch.reward;
+        totalMined += batch.reward;
+        
+        // 转移代币
+        require(totalMined <= MAX_SUPPLY, "Exceeds supply");
+        IERC20(rewardToken).transfer(msg.sender, batch.reward);
+        
+        emit BatchChallengeSolved(_batchId, leaf, msg.sender, _answer);
+        emit RewardClaimed(msg.sender, batch.reward);
+    }
+    
     // 提交答案
     function submitSolution(uint256 _challengeId, string calldata _answer) external nonReentrant {
         Challenge storage challenge = challenges[_challengeId];
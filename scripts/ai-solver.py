@@ -12,6 +12,15 @@ import math
 from typing import List, Tuple, Optional
 import requests
 
+from hash_index import default_index, find_preimage
+from profiler import profiled
+from safe_eval import evaluate_in_text, format_number
+from sequence import MIN_CONFIDENCE, extract_sequence, predict_next
+
+# 索引未命中时的暴力搜索上限; 求解器在集成中有截止时间 (默认 0.5s), 且线程无法中断
+HASH_SEARCH_LIMIT = 200000
+HASH_SEARCH_DEADLINE = 0.2
+
 # Challenge types and their solvers
 class ChallengeSolver:
     def __init__(self):
@@ -51,10 +60,10 @@ class ChallengeSolver:
             
         elif challenge_type == "hash_reverse":
             # 反转哈希 (简化版: 找前缀)
-            target = hashlib.sha256(str(random.randint(1, 10000)).encode()).hexdigest()[:8]
+            n = random.randint(1, 10000)
+            target = hashlib.sha256(str(n).encode()).hexdigest()[:8]
             challenge = f"Find a number whose SHA256 starts with '{target}'"
-            # 简化: 答案就是找到的数字
-            answer = "0"  # 简化版本
+            answer = str(n)
             
         elif challenge_type == "pattern_sequence":
             # 找序列规律
@@ -130,43 +139,37 @@ class ChallengeSolver:
                     n = int(nums[0])
                     return str(int(math.sqrt(n)))
             
-            if "+" in challenge or "-" in challenge or "*" in challenge or "/" in challenge:
-                import re
-                expr = re.findall(r'[\d\+\-\*\/]+', challenge)
-                if expr:
-                    try:
-                        return str(eval(expr[0]))
-                    except:
-                        pass
+            # 四则运算 (含 × ÷ ^ ² √), 不使用 eval
+            value = evaluate_in_text(challenge)
+            if value is not None:
+                return format_number(value)
         except:
             pass
         return None
     
     def solve_hash(self, challenge: str) -> Optional[str]:
-        """哈希问题求解"""
+        """哈希问题求解: 先查预计算的前缀索引, 未命中再暴力搜索"""
+        try:
+            if "sha256" in challenge.lower():
+                import re
+                match = re.search(r"starts with '([0-9a-fA-F]+)'", challenge)
+                if match:
+                    n = find_preimage(match.group(1), default_index(),
+                                      search_limit=HASH_SEARCH_LIMIT, deadline=HASH_SEARCH_DEADLINE)
+                    if n is not None:
+                        return str(n)
+        except:
+            pass
         return None
     
     def solve_pattern(self, challenge: str) -> Optional[str]:
         """序列问题求解"""
         try:
-            numbers = [int(n) for n in challenge.split() if n.isdigit()]
-            if len(numbers) >= 3:
-                # 等差数列
-                diffs = [numbers[i+1] - numbers[i] for i in range(len(numbers)-1)]
-                if len(set(diffs)) == 1:
-                    return str(numbers[-1] + diffs[0])
-                
-                # 等比数列
-                if numbers[1] != 0:
-                    ratios = [numbers[i+1] / numbers[i] for i in range(len(numbers)-1)]
-                    if len(set(ratios)) == 1:
-                        return str(int(numbers[-1] * ratios[0]))
-                
-                # 斐波那契风格
-                if len(numbers) >= 3:
-                    for i in range(len(numbers) - 2):
-                        if numbers[i+2] == numbers[i+1] + numbers[i]:
-                            return str(numbers[-1] + numbers[-2])
+            numbers = extract_sequence(challenge)
+            if numbers:
+                prediction = predict_next(numbers)
+                if prediction and prediction.confidence >= MIN_CONFIDENCE:
+                    return str(prediction.value)
         except:
             pass
         return None
@@ -191,6 +194,7 @@ class ChallengeSolver:
             pass
         return None
     
+    @profiled()
     def solve(self, challenge: str) -> Optional[str]:
         """使用所有策略尝试解决问题"""
         for strategy in self.strategies:
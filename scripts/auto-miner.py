@@ -10,28 +10,70 @@ import subprocess
 import json
 import re
 import sys
+from collections import OrderedDict
 from datetime import datetime
 
+from ensemble import build_default_ensemble
+from preflight import MinePreflight
+from profiler import profiled
+from rate_control import RateControllers, parse_retry_after
+from snapshot import Checkpointer, load_snapshot
+
 # 配置
 CONFIG = {
     "wallet": "0x...",  # 你的钱包地址
     "private_key": "...",  # 你的私钥
     "api_url": "http://localhost:8080",  # API 地址
     "contract": "0x...",  # 合约地址
-    "bsc_rpc": "https://bsc-dataseed.binance.org/"
+    "bsc_rpc": "https://bsc-dataseed.binance.org/",
+    "cooldown": 300,  # BSCAIMiner 冷却时间 (秒), 无法从链上读取时使用
+    "signer": None,  # mineData 签名者地址 (可选; 配置后按 preflight.py 中的签名约定检查签名)
+    "solve_deadline": 0.5,  # 每题求解截止时间 (秒)
+    # 各端点速率控制参数 (可选), 例如 {"api": {"initial_rate": 2, "max_rate": 10}}
+    "rate_control": {
+        "api": {"initial_rate": 1.0, "max_rate": 20.0},
+        "rpc": {"initial_rate": 1.0, "max_rate": 10.0}
+    },
+    "snapshot_path": "miner-snapshot.bin",  # 热状态快照 (None 表示不保存)
+    "snapshot_interval": 60,  # 快照间隔 (秒)
+    "answer_cache_size": 4096  # 已确认正确的答案缓存条数
 }
 
+# ethers 报错中表示 RPC 节点限流/不可用的标记; revert、nonce、余额不足、脚本错误与 RPC 负载无关
+RPC_THROTTLED = re.compile(r"\b429\b|Too Many Requests")
+RPC_UNAVAILABLE = re.compile(r"\b50[234]\b|SERVER_ERROR|NETWORK_ERROR|TIMEOUT|ECONNREFUSED|ECONNRESET|ETIMEDOUT")
+
+# BSCAIMiner 只读方法选择器: keccak256("lastMineTime(address)")[:4], keccak256("cooldown()")[:4]
+LAST_MINE_TIME_SELECTOR = "0xee6b373b"
+COOLDOWN_SELECTOR = "0x787a08a6"
+
 class AutoMiner:
     """自动挖矿器"""
     
-    def __init__(self):
+    def __init__(self, config=None):
+        self.config = CONFIG if config is None else config
         self.stats = {
             "total_attempts": 0,
             "correct_answers": 0,
             "chain_transactions": 0,
+            "preflight_rejected": 0,
+            "skipped": 0,
             "start_time": None
         }
+        self.rate = RateControllers(**self.config.get('rate_control', {}))
+        self.preflight = MinePreflight(self.config['wallet'], self.config['bsc_rpc'], self.config.get('signer'),
+                                       rpc_rate=self.rate['rpc'])
+        self.preflight.cooldown = self.config.get('cooldown', 300)
+        self.ensemble = build_default_ensemble(self.solve_challenge,
+                                               deadline=self.config.get('solve_deadline', 0.5))
+        self.answer_cache = OrderedDict()  # 问题 → 已确认正确的答案
+        self.answer_cache_size = self.config.get('answer_cache_size', 4096)
+        self.account_nonce = None  # 下一笔交易的账户 nonce, None 时由 ethers 自行读取
+        self.chain_checked = False  # 账户 nonce 与冷却时间是否已与链上核对
+        path = self.config.get('snapshot_path')
+        self.checkpointer = Checkpointer(path, self.config.get('snapshot_interval', 60)) if path else None
     
+    @profiled()
     def solve_challenge(self, question):
         """解答挑战"""
         question = question.strip()
@@ -46,7 +88,7 @@ class AutoMiner:
         
         # 数学运算
         patterns = [
-            (r'(\d+)\s*×\s*(\d+)', lambda m: str(int(m.group(1)) * int(m.group(2))),
+            (r'(\d+)\s*×\s*(\d+)', lambda m: str(int(m.group(1)) * int(m.group(2)))),
             (r'(\d+)\s*\+\s*(\d+)', lambda m: str(int(m.group(1)) + int(m.group(2)))),
             (r'(\d+)\s*-\s*(\d+)', lambda m: str(int(m.group(1)) - int(m.group(2)))),
             (r'(\d+)\s*\*\s*(\d+)', lambda m: str(int(m.group(1)) * int(m.group(2)))),
@@ -91,16 +133,22 @@ class AutoMiner:
         
         return "0"
     
-    def submit_chain_transaction(self, mine_data):
+    def submit_chain_transaction(self, mine_data, account_nonce=None):
         """提交链上交易"""
+        overrides = 'value: ethers.parseEther("0.005")'
+        if account_nonce is not None:
+            overrides += f', nonce: {account_nonce}'
         script = f'''
         const ethers = require('/root/.openclaw/node_modules/ethers');
-        const w = new ethers.Wallet("{CONFIG['private_key']}", new ethers.JsonRpcProvider("{CONFIG['bsc_rpc']}"));
-        const c = new ethers.Contract("{CONFIG['contract']}", ["function mine(bytes32,uint256,bytes) payable"], w);
-        const tx = await c.mine("{mine_data['nonce']}", {mine_data['expiry']}, "{mine_data['signature']}", {{value: ethers.parseEther("0.005")}});
+        const w = new ethers.Wallet("{self.config['private_key']}", new ethers.JsonRpcProvider("{self.config['bsc_rpc']}"));
+        const c = new ethers.Contract("{self.config['contract']}", ["function mine(bytes32,uint256,bytes) payable"], w);
+        const tx = await c.mine("{mine_data['nonce']}", {mine_data['expiry']}, "{mine_data['signature']}", {{{overrides}}});
         console.log(tx.hash);
         '''
         
+        rpc = self.rate['rpc']
+        rpc.acquire()
+        start = time.monotonic()
         try:
             with open('/tmp/bsc-mine-tx.js', 'w') as f:
                 f.write(script)
@@ -112,18 +160,61 @@ class AutoMiner:
                 timeout=60
             )
             
+            # 只把限流和传输错误计入 RPC 速率控制; 成功的耗时包含 node 启动和多次 RPC 往返,
+            # 与单次请求的延迟不可比, 也不计入
             if result.returncode == 0 and result.stdout.strip():
                 return result.stdout.strip()
+            if RPC_THROTTLED.search(result.stderr):
+                rpc.record(time.monotonic() - start, 429)
+            elif RPC_UNAVAILABLE.search(result.stderr):
+                rpc.record(time.monotonic() - start, 500)
+            lines = result.stderr.strip().splitlines()
+            print(f"    链上错误: {lines[-1][:120] if lines else f'退出码 {result.returncode}'}")
+            return None
+        except subprocess.TimeoutExpired:
+            rpc.record(time.monotonic() - start, None)
+            print(f"    链上错误: 超时")
             return None
         except Exception as e:
             print(f"    链上错误: {e}")
             return None
     
+    def api_request(self, method, path, **kwargs):
+        """经速率控制器发出 API 请求, 非 2xx 返回 None"""
+        api = self.rate['api']
+        api.acquire()
+        start = time.monotonic()
+        try:
+            r = requests.request(method, f"{self.config['api_url']}{path}", timeout=10, **kwargs)
+        except requests.RequestException:
+            api.record(time.monotonic() - start, None)
+            raise
+        api.record(time.monotonic() - start, r.status_code, parse_retry_after(r.headers.get("Retry-After")))
+        if not 200 <= r.status_code < 300:
+            print(f"    API 状态 {r.status_code}")
+            return None
+        return r.json()
+    
+    def rpc_call(self, method, params):
+        """经速率控制器发出 JSON-RPC 请求, 失败时返回 None"""
+        rpc = self.rate['rpc']
+        rpc.acquire()
+        start = time.monotonic()
+        payload = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
+        try:
+            r = requests.post(self.config['bsc_rpc'], json=payload, timeout=10)
+        except requests.RequestException:
+            rpc.record(time.monotonic() - start, None)
+            raise
+        rpc.record(time.monotonic() - start, r.status_code, parse_retry_after(r.headers.get("Retry-After")))
+        if not 200 <= r.status_code < 300:
+            return None
+        return r.json().get("result")
+    
     def get_challenge(self):
         """获取挑战"""
         try:
-            r = requests.get(f"{CONFIG['api_url']}/challenge?wallet={CONFIG['wallet']}", timeout=10)
-            return r.json()
+            return self.api_request("GET", f"/challenge?wallet={self.config['wallet']}")
         except Exception as e:
             print(f"    API 错误: {e}")
             return None
@@ -132,68 +223,223 @@ class AutoMiner:
         """提交答案"""
         try:
             data = {
-                "wallet": CONFIG['wallet'],
+                "wallet": self.config['wallet'],
                 "challengeId": challenge_id,
                 "answer": answer,
                 "_token": token
             }
-            r = requests.post(f"{CONFIG['api_url']}/answer", json=data, timeout=10)
-            return r.json()
+            return self.api_request("POST", "/answer", json=data)
         except Exception as e:
             print(f"    提交错误: {e}")
             return None
     
-    def run(self, max_attempts=1000, delay=2):
-        """运行挖矿"""
+    @profiled(lambda self, *args, **kwargs: ("mining", None))
+    def run(self, max_attempts=1000, delay=None):
+        """运行挖矿
+
+        请求节奏由各端点的速率控制器决定; delay 不为 None 时每轮额外固定等待
+        """
         self.stats["start_time"] = datetime.now()
         
         print("="*60)
         print("⛏️ BSC AI Auto Miner")
         print("="*60)
-        print(f"钱包: {CONFIG['wallet'][:10]}...")
-        print(f"API: {CONFIG['api_url']}")
+        print(f"钱包: {self.config['wallet'][:10]}...")
+        print(f"API: {self.config['api_url']}")
         print("="*60)
+        self.warm_start()
         
-        for i in range(max_attempts):
-            self.stats["total_attempts"] += 1
-            
-            # 获取挑战
-            challenge = self.get_challenge()
-            if not challenge:
-                print(f"[{i+1}/{max_attempts}] API 不可用，等待...")
-                time.sleep(5)
-                continue
-            
-            # 解答
-            answer = self.solve_challenge(challenge.get("question", ""))
-            print(f"[{i+1}/{max_attempts}] {challenge.get('question', '')[:40]}... → {answer}")
-            
-            # 提交答案
-            result = self.submit_answer(
-                challenge.get("challengeId"),
-                answer,
-                challenge.get("_token")
-            )
-            
-            if result and result.get("correct"):
-                self.stats["correct_answers"] += 1
-                print(f"    ✓ 正确!")
+        try:
+            for i in range(max_attempts):
+                self.stats["total_attempts"] += 1
                 
-                # 提交链上交易
-                if "mineData" in result:
-                    tx = self.submit_chain_transaction(result["mineData"])
-                    if tx:
-                        self.stats["chain_transactions"] += 1
-                        print(f"    📤 {tx[:40]}...")
-                    else:
-                        print(f"    ❌ 链上失败")
-            else:
-                print(f"    ✗ 错误")
-            
-            time.sleep(delay)
+                # 获取挑战
+                challenge = self.get_challenge()
+                if not challenge:
+                    print(f"[{i+1}/{max_attempts}] API 不可用，等待...")
+                    continue
+                
+                self.handle_challenge(f"[{i+1}/{max_attempts}]", challenge)
+                
+                if self.checkpointer and self.checkpointer.due():
+                    self.checkpoint()
+                
+                if delay is not None:
+                    time.sleep(delay)
+        finally:
+            # 正常结束、中断或异常退出时都保存一次
+            self.checkpoint()
         
         self.print_stats()
     
+    @profiled(lambda self, label, challenge: (challenge.get("type"), challenge.get("difficulty")))
+    def handle_challenge(self, label, challenge):
+        """解答一道挑战, 答对后提交链上交易"""
+        # 解答 (先查已确认的答案缓存, 再交给求解器集成; 全部弃权时不提交)
+        question = challenge.get("question", "")
+        cached = self.answer_cache.get(question)
+        answer = cached if cached is not None else self.ensemble.solve(question, challenge)
+        if answer is None:
+            self.stats["skipped"] += 1
+            print(f"{label} {question[:40]}... → 无法解答, 跳过")
+            return
+        print(f"{label} {question[:40]}... → {answer}")
+        
+        # 提交答案
+        result = self.submit_answer(
+            challenge.get("challengeId"),
+            answer,
+            challenge.get("_token")
+        )
+        if result is not None:
+            self.ensemble.feedback(question, answer, bool(result.get("correct")))
+            if result.get("correct"):
+                self.cache_answer(question, answer)
+            elif cached is not None:
+                self.answer_cache.pop(question, None)
+        
+        if result and result.get("correct"):
+            self.stats["correct_answers"] += 1
+            print(f"    ✓ 正确!")
+            
+            # 提交链上交易
+            if "mineData" in result:
+                if not self.chain_checked:
+                    self.check_chain_state()
+                ok, reason = self.preflight.check(result["mineData"])
+                if not ok:
+                    self.stats["preflight_rejected"] += 1
+                    print(f"    ⚠️ 预检未通过, 跳过: {reason}")
+                    return
+                
+                wait = self.preflight.cooldown_remaining()
+                if wait > 0:
+                    print(f"    ⏳ 冷却中, 等待 {wait:.0f}s")
+                    time.sleep(wait)
+                
+                nonce = self.account_nonce
+                tx = self.submit_chain_transaction(result["mineData"], nonce)
+                self.preflight.record(result["mineData"])
+                if tx:
+                    self.stats["chain_transactions"] += 1
+                    self.preflight.record_mine()
+                    if nonce is not None:
+                        self.account_nonce = nonce + 1
+                    print(f"    📤 {tx[:40]}...")
+                else:
+                    # 失败的交易不一定占用了 nonce, 下次提交前重新与链上核对
+                    self.account_nonce = None
+                    self.chain_checked = False
+                    print(f"    ❌ 链上失败")
+        else:
+            print(f"    ✗ 错误")
+    
+    def cache_answer(self, question, answer):
+        """记录已确认正确的答案, 超出容量时淘汰最早的条目"""
+        self.answer_cache[question] = answer
+        self.answer_cache.move_to_end(question)
+        while len(self.answer_cache) > self.answer_cache_size:
+            self.answer_cache.popitem(last=False)
+    
+    def call_uint(self, data):
+        """对合约发起 eth_call 并解析 uint256 返回值"""
+        result = self.rpc_call("eth_call", [{"to": self.config['contract'], "data": data}, "latest"])
+        if not result or result == "0x":
+            raise ValueError(f"eth_call {data[:10]} 无返回值")
+        return int(result, 16)
+    
+    def check_chain_state(self):
+        """与链上 (BSCAIMiner) 核对账户 nonce 和冷却时间, 以链上为准
+
+        账户 nonce 读取失败时不使用快照值 (交给 ethers 读取);
+        冷却时间读取失败时使用配置的 cooldown, 上次挖矿时间保留快照或本地记录的值
+        """
+        self.chain_checked = True
+        wallet = self.config['wallet']
+        ok = True
+        try:
+            nonce = int(self.rpc_call("eth_getTransactionCount", [wallet, "pending"]), 16)
+            if self.account_nonce is not None and self.account_nonce != nonce:
+                print(f"    账户 nonce 与快照不一致: {self.account_nonce} → {nonce}")
+            self.account_nonce = nonce
+        except Exception as e:
+            print(f"    账户 nonce 读取失败: {e}")
+            self.account_nonce = None
+            ok = False
+        try:
+            last_mine = self.call_uint(LAST_MINE_TIME_SELECTOR + wallet[2:].lower().rjust(64, "0"))
+            cooldown = self.call_uint(COOLDOWN_SELECTOR)
+            self.preflight.last_mine = max(self.preflight.last_mine, last_mine)
+            self.preflight.cooldown = cooldown
+        except Exception as e:
+            print(f"    冷却时间读取失败, 使用配置值 {self.config.get('cooldown', 300)}s: {e}")
+            self.preflight.cooldown = self.config.get('cooldown', 300)
+            ok = False
+        return ok
+    
+    def hot_state(self):
+        """需要跨重启保留的状态"""
+        return {
+            "wallet": self.config['wallet'].lower(),
+            "stats": {k: v for k, v in self.stats.items() if k != "start_time"},
+            "account_nonce": self.account_nonce,
+            "last_mine": self.preflight.last_mine,
+            "cooldown": self.preflight.cooldown,
+            "answer_cache": list(self.answer_cache.items()),
+            "seen_nonces": list(self.preflight.seen_nonces),
+            "routes": self.ensemble.snapshot(),
+            "rates": {name: state["rate"] for name, state in self.rate.snapshot().items()},
+        }
+    
+    def checkpoint(self):
+        """保存热状态快照"""
+        if self.checkpointer:
+            self.checkpointer.save(self.hot_state())
+    
+    def warm_start(self):
+        """从快照恢复热状态; 账户 nonce 与冷却时间在首次提交交易前与链上核对"""
+        if not self.checkpointer:
+            return False
+        state = load_snapshot(self.checkpointer.path)
+        if state is None:
+            return False
+        if state.get("wallet") != self.config['wallet'].lower():
+            print("⚠️ 快照属于其他钱包, 忽略")
+            return False
+        
+        # 先完整解析并校验各字段, 全部有效后再写入, 避免半途失败留下部分恢复的状态
+        try:
+            stats = {key: int(value) for key, value in state["stats"].items() if key in self.stats}
+            answers = [(str(question), str(answer)) for question, answer in state["answer_cache"]]
+            nonces = [str(nonce) for nonce in state["seen_nonces"]]
+            routes = state["routes"]
+            type(self.ensemble)().load(routes)
+            rates = {str(name): float(rate) for name, rate in state["rates"].items()}
+            account_nonce = None if state["account_nonce"] is None else int(state["account_nonce"])
+            last_mine, cooldown = float(state["last_mine"]), float(state["cooldown"])
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            print(f"⚠️ 快照字段无效, 冷启动: {e!r}")
+            return False
+        
+        self.stats.update(stats)
+        for question, answer in answers:
+            self.cache_answer(question, answer)
+        for nonce in nonces:
+            self.preflight.seen_nonces.add(nonce)
+        self.ensemble.load(routes)
+        for name, rate in rates.items():
+            if name in self.rate.controllers:
+                controller = self.rate[name]
+                controller.rate = max(controller.min_rate, min(controller.max_rate, rate))
+        self.account_nonce = account_nonce
+        self.preflight.last_mine = last_mine
+        self.preflight.cooldown = cooldown
+        self.chain_checked = False
+        
+        print(f"♻️ 已恢复 {time.time() - state['saved_at']:.0f}s 前的快照: "
+              f"答案缓存 {len(self.answer_cache)} 条, 已见 nonce {len(self.preflight.seen_nonces)} 个")
+        return True
+    
     def print_stats(self):
         """打印统计"""
         elapsed = datetime.now() - self.stats["start_time"]
@@ -204,12 +450,17 @@ class AutoMiner:
         print(f"总尝试: {self.stats['total_attempts']}")
         print(f"正确: {self.stats['correct_answers']}")
         print(f"链上提交: {self.stats['chain_transactions']}")
+        print(f"预检拦截: {self.stats['preflight_rejected']}")
+        print(f"无法解答: {self.stats['skipped']}")
+        print(f"答案缓存: {len(self.answer_cache)} 条")
         print(f"耗时: {elapsed}")
+        for ctype, entry in sorted(self.ensemble.snapshot().items()):
+            print(f"路由[{ctype}]: {entry['route'] or '全部并行'}")
+        for name, state in self.rate.snapshot().items():
+            print(f"速率[{name}]: {state['rate']}/s (降速 {state['decreases']} 次, 限流 {state['throttled']} 次)")
         print("="*60)
 
 def main():
-    miner = AutoMiner()
-    
     # 从配置文件加载
     try:
         with open('config.json', 'r') as f:
@@ -218,6 +469,7 @@ def main():
     except:
         print("⚠️ 使用默认配置，请创建 config.json")
     
+    miner = AutoMiner()
     miner.run()
 
 if __name__ == "__main__":
@@ -11,6 +11,12 @@ import json
 from typing import List, Tuple, Optional, Dict
 import re
 
+from challenge_record import Challenge, PoolWriter
+from merkle import MerkleBatchWriter
+from profiler import profiled
+from safe_eval import evaluate_in_text, format_number
+from sequence import MIN_CONFIDENCE, extract_sequence, predict_next
+
 class AdvancedChallengeGenerator:
     """高级挑战生成器"""
     
@@ -233,11 +239,32 @@ class AdvancedChallengeGenerator:
                 "question": f"Calculate: {a} + {b} = ?",
                 "answer": str(a + b)
             }, str(a + b)
+    
+    def generate_record(self, difficulty: int = 3) -> Challenge:
+        """生成挑战并转换为 Challenge 记录 (答案以加盐承诺形式保存, 答案与盐值留在记录上)"""
+        challenge, _ = self.generate_challenge(difficulty)
+        return Challenge.from_dict(challenge)
+    
+    def commit_batch(self, count: int, difficulty: int = 3, path: str = "challenge-batch") -> MerkleBatchWriter:
+        """生成一批挑战并用一个 Merkle 根承诺
+        
+        挑战流式写入 <path>.pool (二进制挑战池, 只含加盐的答案承诺), 树写入 <path>.merkle, 叶子为编码后的记录;
+        返回已完成的树, finalize() 为根 (交给 BAIMMiner.postChallengeBatch), proof(i) 为第 i 题的证明;
+        矿工答对后由出题方下发该题的盐值, 矿工再以 (记录, 证明, 答案, 盐值) 调用 submitBatchSolution 领奖
+        """
+        tree = MerkleBatchWriter(f"{path}.merkle")
+        with PoolWriter(f"{path}.pool") as pool:
+            for _ in range(count):
+                record = self.generate_record(difficulty)
+                tree.add(pool.write(record))
+        tree.finalize()
+        return tree
 
 
 class AIProblemSolver:
     """AI 问题求解器"""
     
+    @profiled(lambda self, challenge: (challenge.get("type"), challenge.get("difficulty")))
     def solve(self, challenge: Dict) -> Optional[str]:
         """尝试解决挑战"""
         
@@ -302,39 +329,21 @@ class AIProblemSolver:
             if len(numbers) >= 2:
                 return f"{numbers[0]},{numbers[1]}"
         
-        # 基本运算
-        for op in ['+', '-', '×', '*', '/']:
-            if op in question:
-                expr = re.findall(rf'\d+\s*\{re.escape(op)}\s*\d+', question)
-                if expr:
-                    try:
-                        clean_expr = expr[0].replace('×', '*')
-                        return str(eval(clean_expr))
-                    except:
-                        pass
+        # 基本运算 (含 × ÷ ^ ² √), 不使用 eval
+        value = evaluate_in_text(question)
+        if value is not None:
+            return format_number(value)
         
         return None
     
     def solve_pattern(self, question: str) -> Optional[str]:
         """序列问题求解"""
-        numbers = [int(n) for n in re.findall(r'\d+', question)]
+        numbers = extract_sequence(question)
         
-        if len(numbers) >= 3:
-            # 等差
-            diffs = [numbers[i+1] - numbers[i] for i in range(len(numbers)-1)]
-            if len(set(diffs)) == 1:
-                return str(numbers[-1] + diffs[0])
-            
-            # 等比
-            if 0 not in numbers[1:]:
-                ratios = [numbers[i+1] / numbers[i] for i in range(len(numbers)-1)]
-                if len(set(ratios)) == 1:
-                    return str(int(numbers[-1] * ratios[0]))
-            
-            # 斐波那契
-            for i in range(len(numbers) - 2):
-                if numbers[i+2] == numbers[i+1] + numbers[i]:
-                    return str(numbers[-1] + numbers[-2])
+        if numbers:
+            prediction = predict_next(numbers)
+            if prediction and prediction.confidence >= MIN_CONFIDENCE:
+                return str(prediction.value)
         
         return None
     
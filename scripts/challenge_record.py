@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+挑战记录与紧凑二进制格式
+Challenge 使用 __slots__ 存储, 答案只以加盐 sha256 承诺传输 (盐值由出题方保留); JSON 格式保留用于兼容
+"""
+
+import hashlib
+import json
+import secrets
+import struct
+import sys
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# 池头: magic, 版本, 保留, 记录数
+POOL_HEADER = struct.Struct("<4sBBI")
+POOL_MAGIC = b"BAIC"
+# 版本 2: 承诺改为 sha256(盐 || 答案)
+FORMAT_VERSION = 2
+
+# 记录头: 类型码, 难度, 标志, 问题长度, 提示长度, 序列项数, 答案承诺
+RECORD_HEADER = struct.Struct("<BBBHHH32s")
+FLAG_CUSTOM_TYPE = 0x01
+
+TYPE_CODES = {"math": 1, "pattern": 2, "crypto": 3, "hash": 4}
+TYPE_NAMES = {code: name for name, code in TYPE_CODES.items()}
+
+INT64 = struct.Struct("<q")
+_NATIVE_LITTLE = sys.byteorder == "little"
+
+
+SALT_SIZE = 16
+
+
+def new_salt() -> bytes:
+    return secrets.token_bytes(SALT_SIZE)
+
+
+def commit_answer(answer: str, salt: bytes) -> bytes:
+    """答案承诺: sha256(盐 || answer)
+
+    答案大多来自很小的取值范围, 不加盐的承诺可以直接用字典反查
+    """
+    return hashlib.sha256(salt + answer.encode()).digest()
+
+
+class Challenge:
+    """挑战记录"""
+
+    __slots__ = ("type", "difficulty", "question", "hint", "sequence", "commitment", "answer", "salt")
+
+    def __init__(self, type: str, difficulty: int, question: str, commitment: bytes,
+                 hint: str = "", sequence: Sequence[int] = (), answer: Optional[str] = None,
+                 salt: Optional[bytes] = None):
+        self.type = type
+        self.difficulty = difficulty
+        self.question = question
+        self.commitment = commitment
+        self.hint = hint
+        self.sequence = sequence
+        self.answer = answer  # 答案与盐值仅在出题方本地持有, 不进入二进制编码
+        self.salt = salt
+
+    def __repr__(self):
+        return f"Challenge({self.type!r}, {self.difficulty}, {self.question!r})"
+
+    def __eq__(self, other):
+        if not isinstance(other, Challenge):
+            return NotImplemented
+        return (self.type, self.difficulty, self.question, self.hint, list(self.sequence),
+                bytes(self.commitment)) == (other.type, other.difficulty, other.question,
+                                            other.hint, list(other.sequence), bytes(other.commitment))
+
+    def get(self, key: str, default=None):
+        """兼容按 dict 读取挑战的旧代码"""
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        return default if value in (None, "", ()) else value
+
+    def verify(self, answer: str, salt: Optional[bytes] = None) -> bool:
+        """检查答案是否与承诺一致; salt 默认使用出题方保存的盐值"""
+        salt = self.salt if salt is None else salt
+        if salt is None:
+            raise ValueError("缺少盐值, 无法验证承诺")
+        return commit_answer(answer, salt) == bytes(self.commitment)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Challenge":
+        """从 dict 构造; 只有答案时生成新的盐值并计算承诺"""
+        answer = data.get("answer")
+        salt = bytes.fromhex(data["salt"]) if data.get("salt") else None
+        if "commitment" in data:
+            commitment = bytes.fromhex(data["commitment"])
+        elif answer is not None:
+            salt = salt or new_salt()
+            commitment = commit_answer(answer, salt)
+        else:
+            raise ValueError("挑战缺少 answer 或 commitment")
+        return cls(
+            type=data["type"],
+            difficulty=int(data["difficulty"]),
+            question=data["question"],
+            commitment=commitment,
+            hint=data.get("hint", ""),
+            sequence=data.get("sequence", ()),
+            answer=answer,
+            salt=salt,
+        )
+
+    def to_dict(self, include_answer: bool = False) -> Dict:
+        data = {
+            "type": self.type,
+            "difficulty": self.difficulty,
+            "question": self.question,
+            "commitment": bytes(self.commitment).hex(),
+        }
+        if self.hint:
+            data["hint"] = self.hint
+        if len(self.sequence):
+            data["sequence"] = list(self.sequence)
+        if include_answer and self.answer is not None:
+            data["answer"] = self.answer
+            if self.salt is not None:
+                data["salt"] = self.salt.hex()
+        return data
+
+    def to_json(self, include_answer: bool = False) -> str:
+        return json.dumps(self.to_dict(include_answer), ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, text: str) -> "Challenge":
+        return cls.from_dict(json.loads(text))
+
+
+def encode_record(challenge: Challenge) -> bytes:
+    """编码单条记录"""
+    question = challenge.question.encode()
+    hint = challenge.hint.encode()
+    code = TYPE_CODES.get(challenge.type, 0)
+    flags = 0 if code else FLAG_CUSTOM_TYPE
+    parts = [RECORD_HEADER.pack(code, challenge.difficulty, flags, len(question), len(hint),
+                                len(challenge.sequence), bytes(challenge.commitment))]
+    if flags & FLAG_CUSTOM_TYPE:
+        name = challenge.type.encode()
+        parts.append(bytes([len(name)]) + name)
+    parts.append(question)
+    parts.append(hint)
+    if len(challenge.sequence):
+        parts.append(struct.pack(f"<{len(challenge.sequence)}q", *challenge.sequence))
+    return b"".join(parts)
+
+
+def decode_record(buf, offset: int = 0) -> Tuple[Challenge, int]:
+    """从 offset 处解码一条记录, 返回 (记录, 下一条的 offset)
+
+    序列在小端平台上直接引用原缓冲区 (memoryview, 零拷贝)
+    """
+    view = buf if isinstance(buf, memoryview) else memoryview(buf)
+    code, difficulty, flags, q_len, h_len, s_len, commitment = RECORD_HEADER.unpack_from(view, offset)
+    offset += RECORD_HEADER.size
+    if flags & FLAG_CUSTOM_TYPE:
+        name_len = view[offset]
+        type_name = str(view[offset + 1:offset + 1 + name_len], "utf-8")
+        offset += 1 + name_len
+    else:
+        type_name = TYPE_NAMES[code]
+    question = str(view[offset:offset + q_len], "utf-8")
+    offset += q_len
+    hint = str(view[offset:offset + h_len], "utf-8")
+    offset += h_len
+    end = offset + s_len * INT64.size
+    if not s_len:
+        sequence = ()
+    elif _NATIVE_LITTLE:
+        sequence = view[offset:end].cast("q")
+    else:
+        sequence = list(struct.unpack_from(f"<{s_len}q", view, offset))
+    return Challenge(type_name, difficulty, question, commitment, hint, sequence), end
+
+
+def encode_pool(challenges: List[Challenge]) -> bytes:
+    """编码挑战池"""
+    parts = [POOL_HEADER.pack(POOL_MAGIC, FORMAT_VERSION, 0, len(challenges))]
+    parts.extend(encode_record(c) for c in challenges)
+    return b"".join(parts)
+
+
+class PoolWriter:
+    """流式写入挑战池文件, 关闭时回填记录数"""
+
+    def __init__(self, path: str):
+        self._file = open(path, "wb")
+        self._file.write(POOL_HEADER.pack(POOL_MAGIC, FORMAT_VERSION, 0, 0))
+        self.count = 0
+
+    def write(self, challenge: Challenge) -> bytes:
+        """写入一条记录, 返回其编码"""
+        data = encode_record(challenge)
+        self._file.write(data)
+        self.count += 1
+        return data
+
+    def close(self):
+        self._file.seek(0)
+        self._file.write(POOL_HEADER.pack(POOL_MAGIC, FORMAT_VERSION, 0, self.count))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_pool(buf) -> Iterator[Challenge]:
+    """逐条解码挑战池"""
+    view = memoryview(buf)
+    magic, version, _, count = POOL_HEADER.unpack_from(view, 0)
+    if magic != POOL_MAGIC:
+        raise ValueError("不是挑战池数据")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"不支持的格式版本: {version}")
+    offset = POOL_HEADER.size
+    for _ in range(count):
+        challenge, offset = decode_record(view, offset)
+        yield challenge
+
+
+def decode_pool(buf) -> List[Challenge]:
+    """解码整个挑战池"""
+    return list(iter_pool(buf))
+
+
+def main():
+    """与 dict/JSON 的内存和吞吐对比"""
+    import time
+    import tracemalloc
+
+    from script_loader import load_script
+
+    generator = load_script("challenge-generator.py").AdvancedChallengeGenerator()
+    n = 100000
+    dicts = [generator.generate_challenge(5)[0] for _ in range(n)]
+
+    print("=" * 60)
+    print(f"  挑战记录基准 ({n} 条)")
+    print("=" * 60)
+
+    # 内存: dict 列表 vs Challenge 列表 vs 二进制池
+    # 两边都从各自的 JSON 文本解码, 字符串都是新对象, 不共享 dicts 中已有的字符串
+    texts = [json.dumps(d) for d in dicts]
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    copies = [json.loads(t) for t in texts]
+    dict_bytes = tracemalloc.get_traced_memory()[0] - base
+    del copies
+    base = tracemalloc.get_traced_memory()[0]
+    records = [Challenge.from_json(t) for t in texts]
+    record_bytes = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del texts
+    pool = encode_pool(records)
+
+    print(f"dict 内存:        {dict_bytes / n:.0f} B/条")
+    print(f"Challenge 内存:   {record_bytes / n:.0f} B/条")
+    print(f"二进制池:         {len(pool) / n:.0f} B/条")
+
+    # 吞吐: JSON vs 二进制
+    start = time.perf_counter()
+    text = json.dumps(dicts)
+    json_encode = time.perf_counter() - start
+    start = time.perf_counter()
+    json.loads(text)
+    json_decode = time.perf_counter() - start
+    start = time.perf_counter()
+    [Challenge.from_dict(d) for d in json.loads(text)]
+    json_records = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pool = encode_pool(records)
+    bin_encode = time.perf_counter() - start
+    start = time.perf_counter()
+    decoded = decode_pool(pool)
+    bin_decode = time.perf_counter() - start
+
+    assert decoded[:100] == records[:100]
+    print(f"JSON:    {len(text) / n:.0f} B/条, 编码 {n / json_encode:,.0f} 条/s, 解码 {n / json_decode:,.0f} 条/s"
+          f" (解码为 Challenge {n / json_records:,.0f} 条/s)")
+    print(f"二进制:  {len(pool) / n:.0f} B/条, 编码 {n / bin_encode:,.0f} 条/s, 解码 {n / bin_decode:,.0f} 条/s")
+    faster = "快于" if bin_decode < json_decode else "慢于"
+    print(f"二进制解码为 Challenge {faster} json.loads 解码为 dict ({json_decode / bin_decode:.2f}x),"
+          f" 是 JSON 解码为 Challenge 的 {json_records / bin_decode:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+求解器集成
+并行运行适用的求解器 (每题有截止时间), 按求解器 × 题型记录滚动准确率与延迟;
+某题型已有足够准确的求解器时, 只路由到其中最快的一个
+"""
+
+import random
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, Optional, Set
+
+from profiler import profile_tag
+from script_loader import load_script
+
+# 滚动统计的平滑系数
+ALPHA = 0.1
+
+
+def classify(question: str, declared: Optional[str] = None) -> str:
+    """题型: 优先使用 API 给出的类型, 否则按关键字判断"""
+    if declared:
+        return declared
+    q = question.lower()
+    if "caesar" in q or "decrypt" in q:
+        return "crypto"
+    if "sha256" in q or "hash" in q:
+        return "hash"
+    if "next" in q or "sequence" in q:
+        return "pattern"
+    if any(k in q for k in ("bool(", "boolean(", "len(", "chr(", "[0]", "binary", "0x", "ascii")):
+        return "code"
+    return "math"
+
+
+class SolverStats:
+    """单个求解器在单个题型上的滚动统计"""
+
+    __slots__ = ("attempts", "answered", "graded", "accuracy", "latency")
+
+    def __init__(self):
+        self.attempts = 0
+        self.answered = 0
+        self.graded = 0
+        self.accuracy = 0.5   # 无数据时的先验
+        self.latency = None   # 秒, EWMA
+
+    def observe_latency(self, seconds: float, answered: bool):
+        self.attempts += 1
+        self.answered += answered
+        self.latency = seconds if self.latency is None else (1 - ALPHA) * self.latency + ALPHA * seconds
+
+    def observe_outcome(self, correct: bool):
+        self.graded += 1
+        self.accuracy = (1 - ALPHA) * self.accuracy + ALPHA * (1.0 if correct else 0.0)
+
+    def to_dict(self) -> Dict:
+        return {"attempts": self.attempts, "answered": self.answered, "graded": self.graded,
+                "accuracy": round(self.accuracy, 4),
+                "latency": round(self.latency, 6) if self.latency is not None else None}
+
+
+class SolverEnsemble:
+    """准确率加权路由的求解器集成"""
+
+    def __init__(self, deadline: float = 0.5, accuracy_threshold: float = 0.9,
+                 min_samples: int = 20, explore_rate: float = 0.05, pending_capacity: int = 1024):
+        self.deadline = deadline
+        self.accuracy_threshold = accuracy_threshold
+        self.min_samples = min_samples
+        self.explore_rate = explore_rate    # 已有路由时仍全量运行的比例, 用于持续评估其他求解器
+        self.solvers: Dict[str, Callable] = {}
+        self.coverage: Dict[str, Optional[Set[str]]] = {}
+        self.stats: Dict[str, Dict[str, SolverStats]] = {}
+        # 待反馈的题目: 问题 → (题型, {求解器: 答案})
+        self.pending = OrderedDict()
+        self.pending_capacity = pending_capacity
+        self.pool = None
+
+    def register(self, name: str, solve: Callable[[str, Dict], Optional[str]],
+                 types: Optional[Set[str]] = None):
+        """注册求解器: solve(question, challenge) 返回答案或 None; types 为 None 表示适用全部题型"""
+        self.solvers[name] = solve
+        self.coverage[name] = types
+        if self.pool is not None:
+            self.pool.shutdown(wait=False)
+        self.pool = ThreadPoolExecutor(max_workers=len(self.solvers), thread_name_prefix="solver")
+
+    def _stats(self, ctype: str, name: str) -> SolverStats:
+        return self.stats.setdefault(ctype, {}).setdefault(name, SolverStats())
+
+    def applicable(self, ctype: str):
+        return [name for name, types in self.coverage.items() if types is None or ctype in types]
+
+    def route(self, ctype: str) -> Optional[str]:
+        """准确率达标的求解器中延迟最低的一个"""
+        best = None
+        for name in self.applicable(ctype):
+            s = self._stats(ctype, name)
+            if s.graded < self.min_samples or s.accuracy < self.accuracy_threshold:
+                continue
+            if best is None or s.latency < self._stats(ctype, best).latency:
+                best = name
+        return best
+
+    def _run(self, names, question: str, challenge: Dict, ctype: str) -> Dict[str, str]:
+        """并行运行求解器, 截止时间内返回的答案"""
+        # 求解器在线程池中运行, 把调用方的分析器标签带过去
+        tag = (ctype, challenge.get("difficulty"))
+        futures = {}
+        for name in names:
+            futures[self.pool.submit(self._timed, name, question, challenge, tag)] = name
+        done, not_done = wait(futures, timeout=self.deadline)
+        answers = {}
+        for future in done:
+            name = futures[future]
+            answer, seconds = future.result()
+            self._stats(ctype, name).observe_latency(seconds, answer is not None)
+            if answer is not None:
+                answers[name] = answer
+        for future in not_done:
+            # 超时的求解器按截止时间计延迟 (线程无法中断, 结果被丢弃)
+            self._stats(ctype, futures[future]).observe_latency(self.deadline, False)
+        return answers
+
+    def _timed(self, name: str, question: str, challenge: Dict, tag=(None, None)):
+        start = time.perf_counter()
+        try:
+            with profile_tag(*tag):
+                answer = self.solvers[name](question, challenge)
+        except Exception:
+            answer = None
+        return (str(answer) if answer not in (None, "") else None), time.perf_counter() - start
+
+    def solve(self, question: str, challenge: Optional[Dict] = None) -> Optional[str]:
+        """解答问题; 所有求解器都无答案时返回 None"""
+        challenge = challenge or {}
+        ctype = classify(question, challenge.get("type"))
+        routed = self.route(ctype)
+        answers = {}
+        if routed and random.random() >= self.explore_rate:
+            answers = self._run([routed], question, challenge, ctype)
+        if not answers:
+            answers = self._run(self.applicable(ctype), question, challenge, ctype)
+        if not answers:
+            return None
+
+        # 按准确率加权投票
+        votes = {}
+        for name, answer in answers.items():
+            votes[answer] = votes.get(answer, 0.0) + self._stats(ctype, name).accuracy
+        answer = max(votes, key=votes.get)
+
+        self.pending[question] = (ctype, answers)
+        while len(self.pending) > self.pending_capacity:
+            self.pending.popitem(last=False)
+        return answer
+
+    def feedback(self, question: str, answer: str, correct: bool):
+        """提交结果回传: 更新给出答案的求解器的准确率"""
+        entry = self.pending.pop(question, None)
+        if entry is None:
+            return
+        ctype, answers = entry
+        for name, given in answers.items():
+            if given == answer:
+                self._stats(ctype, name).observe_outcome(correct)
+            elif correct:
+                # 提交的答案正确, 与之不同的答案都是错的
+                self._stats(ctype, name).observe_outcome(False)
+
+    def snapshot(self) -> Dict:
+        """导出各题型路由与求解器统计"""
+        return {ctype: {"route": self.route(ctype),
+                        "solvers": {name: s.to_dict() for name, s in solvers.items()}}
+                for ctype, solvers in self.stats.items()}
+
+    def load(self, snapshot: Dict):
+        """从 snapshot() 的输出恢复统计"""
+        for ctype, entry in snapshot.items():
+            for name, data in entry.get("solvers", {}).items():
+                s = self._stats(ctype, name)
+                s.attempts, s.answered, s.graded = data["attempts"], data["answered"], data["graded"]
+                s.accuracy, s.latency = data["accuracy"], data["latency"]
+
+
+def build_default_ensemble(auto_solve: Optional[Callable[[str], str]] = None, **kwargs) -> SolverEnsemble:
+    """组装现有的三个求解器
+
+    auto_solve: AutoMiner.solve_challenge (无法解答时返回 "0", 视为弃权)
+    """
+    ensemble = SolverEnsemble(**kwargs)
+
+    if auto_solve is not None:
+        def solve_auto(question, challenge):
+            answer = auto_solve(question)
+            return None if answer == "0" else answer
+        ensemble.register("auto", solve_auto)
+
+    chain_solver = load_script("ai-solver.py").ChallengeSolver()
+
+    def solve_chain(question, challenge):
+        # 直接调用各策略, 跳过 ChallengeSolver.solve 的打印
+        for strategy in chain_solver.strategies:
+            answer = strategy(question)
+            if answer:
+                return answer
+        return None
+    ensemble.register("chain", solve_chain)
+
+    advanced_solver = load_script("challenge-generator.py").AIProblemSolver()
+
+    def solve_advanced(question, challenge):
+        ctype = classify(question, challenge.get("type"))
+        return advanced_solver.solve({"type": ctype, "question": question})
+    ensemble.register("advanced", solve_advanced, {"math", "pattern", "crypto"})
+
+    return ensemble
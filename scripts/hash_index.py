@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+SHA256 前缀 → 原像索引
+对有限整数域预先计算 sha256(str(n)), 截断前缀后排序写入文件, 查询时 mmap + 二分查找;
+域外的目标退回暴力搜索
+"""
+
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from typing import Optional
+
+# 文件头: magic, 版本, 前缀字节数, 保留, 域下界, 域上界, 记录数
+HEADER = struct.Struct("<4sBBHQQQ")
+MAGIC = b"H256"
+VERSION = 1
+VALUE = struct.Struct(">Q")
+
+# ChallengeSolver.generate_challenge("hash_reverse") 的取值范围
+DEFAULT_DOMAIN = (1, 10000)
+DEFAULT_PREFIX_BYTES = 4
+
+
+def sha256_hex(n: int) -> str:
+    return hashlib.sha256(str(n).encode()).hexdigest()
+
+
+def build_index(path: str, lo: int, hi: int, prefix_bytes: int = DEFAULT_PREFIX_BYTES) -> int:
+    """对 [lo, hi] 建立索引并写入 path, 返回记录数
+
+    记录为 (前缀, 值) 定长二进制, 按前缀排序; 整个域在内存中排序, 适用于千万级以内的域
+    """
+    records = [hashlib.sha256(str(n).encode()).digest()[:prefix_bytes] + VALUE.pack(n)
+               for n in range(lo, hi + 1)]
+    records.sort()
+    # 临时文件名唯一, 多个进程同时构建时互不覆盖
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                               dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, prefix_bytes, 0, lo, hi, len(records)))
+            f.write(b"".join(records))
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    return len(records)
+
+
+class HashPrefixIndex:
+    """mmap 只读索引
+
+    文件可能来自共享目录, 打开时校验文件头与文件大小; 查询结果总是用完整哈希确认
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if len(self._mm) < HEADER.size:
+                raise ValueError(f"无效的索引文件: {path}")
+            magic, version, self.prefix_bytes, _, self.lo, self.hi, self.count = HEADER.unpack_from(self._mm, 0)
+            if magic != MAGIC or version != VERSION or not 1 <= self.prefix_bytes <= 32:
+                raise ValueError(f"无效的索引文件: {path}")
+            self.record_size = self.prefix_bytes + VALUE.size
+            if self.count != self.hi - self.lo + 1 or len(self._mm) != HEADER.size + self.count * self.record_size:
+                raise ValueError(f"索引文件大小与文件头不符: {path}")
+        except (ValueError, OSError):
+            self.close()
+            raise
+
+    def close(self):
+        if getattr(self, "_mm", None) is not None:
+            self._mm.close()
+        self._file.close()
+
+    def __contains__(self, n: int) -> bool:
+        return self.lo <= n <= self.hi
+
+    def _prefix_at(self, i: int) -> bytes:
+        offset = HEADER.size + i * self.record_size
+        return self._mm[offset:offset + self.prefix_bytes]
+
+    def _value_at(self, i: int) -> int:
+        return VALUE.unpack_from(self._mm, HEADER.size + i * self.record_size + self.prefix_bytes)[0]
+
+    def _lower_bound(self, key: bytes) -> int:
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._prefix_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def lookup(self, target_hex: str) -> Optional[int]:
+        """查找 sha256(str(n)) 以 target_hex 开头的 n (域内最小前缀序), 找不到返回 None"""
+        target_hex = target_hex.lower()
+        width = self.prefix_bytes * 2
+        # 目标比索引前缀短 (或为奇数位) 时按范围查找
+        head = target_hex[:width]
+        low = bytes.fromhex(head.ljust(width, "0"))
+        high = bytes.fromhex(head.ljust(width, "f"))
+        i = self._lower_bound(low)
+        while i < self.count and self._prefix_at(i) <= high:
+            value = self._value_at(i)
+            # 总是用完整哈希确认 (目标比前缀长, 或索引文件被篡改时前缀并不可信)
+            if sha256_hex(value).startswith(target_hex):
+                return value
+            i += 1
+        return None
+
+
+# 暴力搜索每隔多少个整数检查一次截止时间
+DEADLINE_CHECK_EVERY = 4096
+
+
+def brute_force(target_hex: str, start: int, limit: int, deadline: Optional[float] = None) -> Optional[int]:
+    """从 start 开始暴力搜索 limit 个整数; deadline 为最多耗时 (秒), 超时返回 None"""
+    target_hex = target_hex.lower()
+    stop_at = None if deadline is None else time.perf_counter() + deadline
+    for n in range(start, start + limit):
+        if hashlib.sha256(str(n).encode()).hexdigest().startswith(target_hex):
+            return n
+        if stop_at is not None and n % DEADLINE_CHECK_EVERY == 0 and time.perf_counter() > stop_at:
+            return None
+    return None
+
+
+def find_preimage(target_hex: str, index: Optional[HashPrefixIndex] = None,
+                  search_limit: int = 1000000, deadline: Optional[float] = None) -> Optional[int]:
+    """先查索引, 未命中时从索引域之后暴力搜索 (最多 search_limit 个整数、deadline 秒)"""
+    if index is not None:
+        value = index.lookup(target_hex)
+        if value is not None:
+            return value
+        return brute_force(target_hex, index.hi + 1, search_limit, deadline)
+    return brute_force(target_hex, 0, search_limit, deadline)
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def _open_default(path: str) -> Optional[HashPrefixIndex]:
+    """打开并校验默认域索引, 不存在或与默认域不符时返回 None"""
+    try:
+        index = HashPrefixIndex(path)
+    except (OSError, ValueError):
+        return None
+    if (index.lo, index.hi) != DEFAULT_DOMAIN or index.prefix_bytes != DEFAULT_PREFIX_BYTES:
+        index.close()
+        return None
+    return index
+
+
+def default_index() -> Optional[HashPrefixIndex]:
+    """默认域的索引, 首次使用时在临时目录中构建; 无法构建时返回 None (只能暴力搜索)"""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            lo, hi = DEFAULT_DOMAIN
+            path = os.path.join(tempfile.gettempdir(), f"bsc-ai-miner-sha256-{lo}-{hi}-p{DEFAULT_PREFIX_BYTES}.idx")
+            index = _open_default(path)
+            if index is None:
+                try:
+                    build_index(path, lo, hi)
+                except OSError as e:
+                    print(f"⚠️ 无法构建哈希索引 {path}: {e}")
+                    return None
+                index = _open_default(path)
+            _default_index = index
+        return _default_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="构建 SHA256 前缀索引并测试查询速度")
+    parser.add_argument("--lo", type=int, default=DEFAULT_DOMAIN[0])
+    parser.add_argument("--hi", type=int, default=DEFAULT_DOMAIN[1])
+    parser.add_argument("--prefix-bytes", type=int, default=DEFAULT_PREFIX_BYTES)
+    parser.add_argument("--out", default=None, help="索引文件路径")
+    args = parser.parse_args()
+
+    path = args.out or os.path.join(tempfile.gettempdir(), f"bsc-ai-miner-sha256-{args.lo}-{args.hi}-p{args.prefix_bytes}.idx")
+
+    print("=" * 60)
+    print("  SHA256 前缀索引")
+    print("=" * 60)
+    start = time.perf_counter()
+    count = build_index(path, args.lo, args.hi, args.prefix_bytes)
+    print(f"构建: {count} 条, {os.path.getsize(path) / 1024:.0f} KB, {time.perf_counter() - start:.2f}s → {path}")
+
+    index = HashPrefixIndex(path)
+    import random
+    samples = [random.randint(args.lo, args.hi) for _ in range(2000)]
+    targets = [sha256_hex(n)[:8] for n in samples]
+
+    start = time.perf_counter()
+    found = [index.lookup(t) for t in targets]
+    indexed = time.perf_counter() - start
+    assert all(sha256_hex(v).startswith(t) for v, t in zip(found, targets))
+
+    start = time.perf_counter()
+    for t in targets[:20]:
+        brute_force(t, args.lo, args.hi - args.lo + 1)
+    brute = (time.perf_counter() - start) / 20
+
+    print(f"索引查询: {indexed / len(targets) * 1e6:.1f} µs/次")
+    print(f"暴力搜索: {brute * 1e6:.1f} µs/次")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+BSC AI Miner - 压测工具
+在进程内启动挑战 API 与 JSON-RPC 的替身服务, 注入延迟/错误/限流, 驱动一个或多个矿工并统计吞吐与尾延迟;
+fetch/submit/chain 只计请求本身, 速率控制器的等待单独统计为 pace.api/pace.rpc, cycle 为包含等待的整轮耗时
+"""
+
+import argparse
+import contextlib
+import json
+import math
+import os
+import random
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from script_loader import load_script
+
+
+def make_latency(spec: str) -> Callable[[], float]:
+    """解析延迟分布 (秒)
+
+    const:0.01 | uniform:0.005,0.05 | exp:0.02 | lognormal:0.02,0.5
+    """
+    kind, _, args = spec.partition(":")
+    params = [float(x) for x in args.split(",") if x]
+    if kind == "const":
+        return lambda: params[0]
+    if kind == "uniform":
+        return lambda: random.uniform(params[0], params[1])
+    if kind == "exp":
+        return lambda: random.expovariate(1 / params[0])
+    if kind == "lognormal":
+        # 参数: 中位数, sigma
+        mu = math.log(params[0])
+        return lambda: random.lognormvariate(mu, params[1])
+    raise ValueError(f"未知延迟分布: {spec}")
+
+
+class FaultProfile:
+    """替身服务的故障注入配置"""
+
+    def __init__(self, latency: str = "const:0", error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, retry_after: int = 1):
+        self.latency = make_latency(latency)
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+
+    def inject(self) -> Optional[int]:
+        """模拟延迟, 返回需要注入的错误状态码 (无则 None)"""
+        delay = self.latency()
+        if delay > 0:
+            time.sleep(delay)
+        roll = random.random()
+        if roll < self.throttle_rate:
+            return 429
+        if roll < self.throttle_rate + self.error_rate:
+            return 500
+        return None
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """替身服务的通用请求处理"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status: int, body: Dict, headers: Optional[Dict] = None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, str(value))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_fault(self, status: int) -> bool:
+        if status == 429:
+            self.send_json(429, {"error": "Too Many Requests"},
+                           {"Retry-After": self.server.faults.retry_after})
+        else:
+            self.send_json(status, {"error": "Internal Server Error"})
+        return True
+
+    def read_json(self) -> Dict:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+
+class ChallengeAPIHandler(StandInHandler):
+    """挑战 API 替身: GET /challenge, POST /answer"""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/challenge":
+            return self.send_json(404, {"error": "Not Found"})
+        fault = self.server.faults.inject()
+        if fault:
+            return self.send_fault(fault)
+
+        wallet = parse_qs(url.query).get("wallet", [""])[0].lower()
+        wait = self.server.check_cooldown(wallet)
+        if wait > 0:
+            return self.send_json(429, {"error": "Cooldown not finished"},
+                                  {"Retry-After": math.ceil(wait)})
+
+        challenge, answer = self.server.generator.generate_challenge(random.randint(1, 5))
+        challenge_id = secrets.token_hex(8)
+        token = secrets.token_hex(16)
+        with self.server.lock:
+            self.server.pending[challenge_id] = (wallet, token, answer)
+        self.send_json(200, {
+            "challengeId": challenge_id,
+            "type": challenge["type"],
+            "difficulty": challenge["difficulty"],
+            "question": challenge["question"],
+            "_token": token,
+        })
+
+    def do_POST(self):
+        if self.path != "/answer":
+            return self.send_json(404, {"error": "Not Found"})
+        fault = self.server.faults.inject()
+        if fault:
+            return self.send_fault(fault)
+
+        data = self.read_json()
+        with self.server.lock:
+            pending = self.server.pending.pop(data.get("challengeId"), None)
+        if not pending:
+            return self.send_json(400, {"correct": False, "error": "Unknown challenge"})
+        wallet, token, answer = pending
+        if data.get("wallet", "").lower() != wallet or data.get("_token") != token:
+            return self.send_json(403, {"correct": False, "error": "Invalid token"})
+        if str(data.get("answer")) != answer:
+            return self.send_json(200, {"correct": False})
+
+        # 签名仅满足格式要求 (r, s 落在低半区, v = 27)
+        signature = "0x" + "11" * 32 + "22" * 32 + "1b"
+        self.send_json(200, {
+            "correct": True,
+            "mineData": {
+                "nonce": "0x" + secrets.token_hex(32),
+                "expiry": int(time.time()) + 300,
+                "signature": signature,
+            },
+        })
+
+
+class ChallengeAPIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, faults: FaultProfile, cooldown: float = 0):
+        super().__init__(("127.0.0.1", 0), ChallengeAPIHandler)
+        self.faults = faults
+        self.cooldown = cooldown
+        self.generator = load_script("challenge-generator.py").AdvancedChallengeGenerator()
+        self.pending = {}
+        self.last_request = {}
+        self.lock = threading.Lock()
+
+    def check_cooldown(self, wallet: str) -> float:
+        """按地址限制请求间隔, 返回还需等待的秒数"""
+        if self.cooldown <= 0:
+            return 0
+        now = time.time()
+        with self.lock:
+            last = self.last_request.get(wallet)
+            if last is not None and now - last < self.cooldown:
+                return self.cooldown - (now - last)
+            self.last_request[wallet] = now
+        return 0
+
+
+class JSONRPCHandler(StandInHandler):
+    """JSON-RPC 替身: 仅实现矿工会用到的方法"""
+
+    def do_POST(self):
+        fault = self.server.faults.inject()
+        if fault:
+            return self.send_fault(fault)
+
+        request = self.read_json()
+        method = request.get("method")
+        now = int(time.time())
+        with self.server.lock:
+            if method == "eth_sendRawTransaction":
+                self.server.tx_count += 1
+            tx_count = self.server.tx_count
+        if method == "eth_getBlockByNumber":
+            result = {"number": hex(now // 3), "timestamp": hex(now)}
+        elif method == "eth_blockNumber":
+            result = hex(now // 3)
+        elif method == "eth_chainId":
+            result = hex(56)
+        elif method == "eth_getTransactionCount":
+            result = hex(tx_count)
+        elif method == "eth_call":
+            result = "0x" + "00" * 32
+        elif method == "eth_sendRawTransaction":
+            result = "0x" + secrets.token_hex(32)
+        else:
+            return self.send_json(200, {"jsonrpc": "2.0", "id": request.get("id"),
+                                        "error": {"code": -32601, "message": "Method not found"}})
+        self.send_json(200, {"jsonrpc": "2.0", "id": request.get("id"), "result": result})
+
+
+class JSONRPCServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, faults: FaultProfile):
+        super().__init__(("127.0.0.1", 0), JSONRPCHandler)
+        self.faults = faults
+        self.tx_count = 0
+        self.lock = threading.Lock()
+
+
+def start_server(server: ThreadingHTTPServer) -> str:
+    """后台启动服务, 返回 URL"""
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+class LoadRecorder:
+    """线程安全的延迟与结果记录"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.counts = {}
+
+    def observe(self, op: str, seconds: float, outcome: str):
+        with self.lock:
+            self.latencies.setdefault(op, []).append(seconds)
+            key = f"{op}.{outcome}"
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+
+def percentile(values: List[float], q: float) -> float:
+    """最近秩法百分位"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+def make_load_miner(auto_miner, recorder: LoadRecorder):
+    """构造带计时的矿工子类, 链上提交改为发往 RPC 替身"""
+    requests = auto_miner.requests
+
+    class LoadTestMiner(auto_miner.AutoMiner):
+
+        def __init__(self, config=None):
+            super().__init__(config)
+            self._paced = 0.0
+            for name in ("api", "rpc"):
+                self._time_pacing(self.rate[name])
+
+        def _time_pacing(self, controller):
+            """速率控制器的等待单独记为 pace.<端点>, 不计入请求延迟"""
+            acquire = controller.acquire
+
+            def timed_acquire():
+                wait = acquire()
+                self._paced += wait
+                recorder.observe(f"pace.{controller.name}", wait, "ok")
+                return wait
+            controller.acquire = timed_acquire
+
+        def _timed(self, call):
+            """执行 call, 返回 (结果, 扣除速率控制等待后的耗时)"""
+            self._paced = 0.0
+            start = time.perf_counter()
+            result = call()
+            return result, time.perf_counter() - start - self._paced
+
+        def get_challenge(self):
+            self._cycle_start = time.perf_counter()
+            challenge, elapsed = self._timed(super().get_challenge)
+            ok = bool(challenge) and "question" in challenge
+            recorder.observe("fetch", elapsed, "ok" if ok else "fail")
+            if not challenge:
+                # run() 不会处理这一轮, 在这里记录
+                recorder.observe("cycle", time.perf_counter() - self._cycle_start, "fetch_fail")
+            return challenge
+
+        def handle_challenge(self, label, challenge):
+            """每一轮都记录 cycle, 结果由各步骤写入 _cycle_outcome"""
+            self._cycle_outcome = "skipped"
+            try:
+                return super().handle_challenge(label, challenge)
+            finally:
+                recorder.observe("cycle", time.perf_counter() - self._cycle_start, self._cycle_outcome)
+
+        def submit_answer(self, challenge_id, answer, token):
+            result, elapsed = self._timed(lambda: super(LoadTestMiner, self).submit_answer(challenge_id, answer, token))
+            correct = bool(result and result.get("correct"))
+            recorder.observe("submit", elapsed, "correct" if correct else "wrong")
+            # 答对但未发出交易 (无 mineData 或预检拦截) 时保持 no_mine
+            self._cycle_outcome = "no_mine" if correct else "wrong"
+            return result
+
+        def submit_chain_transaction(self, mine_data, account_nonce=None):
+            rpc = self.rate['rpc']
+            rpc.acquire()
+            start = time.perf_counter()
+            tx = None
+            status = None
+            try:
+                payload = {
+                    "jsonrpc": "2.0",
+                    "id": 1,
+                    "method": "eth_sendRawTransaction",
+                    "params": ["0x" + json.dumps(mine_data).encode().hex()],
+                }
+                r = requests.post(self.config['bsc_rpc'], json=payload, timeout=10)
+                status = r.status_code
+                tx = r.json().get("result")
+            except Exception:
+                pass
+            elapsed = time.perf_counter() - start
+            rpc.record(elapsed, status, auto_miner.parse_retry_after(r.headers.get("Retry-After")) if status else None)
+            recorder.observe("chain", elapsed, "ok" if tx else "fail")
+            self._cycle_outcome = "mined" if tx else "chain_fail"
+            return tx
+
+    return LoadTestMiner
+
+
+def run_load_test(miners: int = 4, attempts: int = 50, api_faults: Optional[FaultProfile] = None,
+                  rpc_faults: Optional[FaultProfile] = None, cooldown: float = 0,
+                  quiet: bool = True) -> Dict:
+    """启动替身服务并运行矿工, 返回统计报告"""
+    auto_miner = load_script("auto-miner.py")
+    api = ChallengeAPIServer(api_faults or FaultProfile(), cooldown)
+    rpc = JSONRPCServer(rpc_faults or FaultProfile())
+    api_url = start_server(api)
+    rpc_url = start_server(rpc)
+
+    recorder = LoadRecorder()
+    miner_cls = make_load_miner(auto_miner, recorder)
+    instances = []
+    for _ in range(miners):
+        config = dict(auto_miner.CONFIG)
+        config.update({
+            "wallet": "0x" + secrets.token_hex(20),
+            "api_url": api_url,
+            "bsc_rpc": rpc_url,
+            "snapshot_path": None,
+        })
+        instances.append(miner_cls(config))
+
+    threads = [threading.Thread(target=m.run, kwargs={"max_attempts": attempts})
+               for m in instances]
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, \
+            (contextlib.redirect_stdout(devnull) if quiet else contextlib.nullcontext()):
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    elapsed = time.perf_counter() - start
+    api.shutdown()
+    rpc.shutdown()
+
+    report = {
+        "miners": miners,
+        "elapsed": elapsed,
+        "cycles_per_sec": len(recorder.latencies.get("cycle", [])) / elapsed,
+        "mines_per_sec": recorder.counts.get("cycle.mined", 0) / elapsed,
+        "counts": dict(sorted(recorder.counts.items())),
+        "latency": {},
+        "rate": {},
+    }
+    # 各矿工控制器最终状态的平均值
+    for name in ("api", "rpc"):
+        states = [m.rate[name].snapshot() for m in instances]
+        report["rate"][name] = {
+            "rate": sum(s["rate"] for s in states) / len(states),
+            "throttled": sum(s["throttled"] for s in states),
+            "decreases": sum(s["decreases"] for s in states),
+        }
+    for op, values in sorted(recorder.latencies.items()):
+        report["latency"][op] = {
+            "p50": percentile(values, 0.50),
+            "p95": percentile(values, 0.95),
+            "p99": percentile(values, 0.99),
+            "max": max(values),
+        }
+    return report
+
+
+def print_report(report: Dict):
+    """打印压测报告"""
+    print("=" * 60)
+    print(f"📊 压测结果 ({report['miners']} 个矿工, {report['elapsed']:.1f}s)")
+    print("=" * 60)
+    print(f"吞吐: {report['cycles_per_sec']:.1f} 轮/s, {report['mines_per_sec']:.1f} 次挖矿/s")
+    print(f"{'操作':<8}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'max(ms)':>10}")
+    for op, stats in report["latency"].items():
+        print(f"{op:<10}" + "".join(f"{stats[k] * 1000:>10.1f}" for k in ("p50", "p95", "p99", "max")))
+    print("-" * 60)
+    for name, state in report["rate"].items():
+        print(f"速率[{name}]: 平均 {state['rate']:.2f}/s, 限流 {state['throttled']} 次, 降速 {state['decreases']} 次")
+    print("-" * 60)
+    for key, count in report["counts"].items():
+        print(f"{key}: {count}")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BSC AI Miner 压测")
+    parser.add_argument("--miners", type=int, nargs="+", default=[1, 4],
+                        help="矿工数量, 可给多个值逐档测试")
+    parser.add_argument("--attempts", type=int, default=50, help="每个矿工的轮数")
+    parser.add_argument("--api-latency", default="lognormal:0.02,0.5")
+    parser.add_argument("--rpc-latency", default="lognormal:0.05,0.5")
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    parser.add_argument("--throttle-rate", type=float, default=0.02)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--cooldown", type=float, default=0, help="每个地址的请求冷却 (秒)")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出报告")
+    args = parser.parse_args()
+
+    for miners in args.miners:
+        report = run_load_test(
+            miners=miners,
+            attempts=args.attempts,
+            api_faults=FaultProfile(args.api_latency, args.error_rate, args.throttle_rate, args.retry_after),
+            rpc_faults=FaultProfile(args.rpc_latency, args.error_rate, args.throttle_rate, args.retry_after),
+            cooldown=args.cooldown,
+        )
+        if args.json:
+            print(json.dumps(report))
+        else:
+            print_report(report)
+
+
+if __name__ == "__main__":
+    main()
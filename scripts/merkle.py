@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+挑战批量承诺的 Merkle 树
+叶子 = sha256(0x00 || 编码后的挑战记录), 内部节点 = sha256(0x01 || 左 || 右), 奇数个节点时最后一个直接上提;
+叶子覆盖整条记录 (题目、类型、难度和加盐的答案承诺), 证明才能说明某道题在批次中, 兄弟叶子也无法反推答案;
+使用 sha256 (而非 keccak256) 以便合约用 sha256 预编译验证
+"""
+
+import hashlib
+import os
+from typing import BinaryIO, List, Optional, Tuple
+
+NODE_SIZE = 32
+# 逐层构建时每次读入的节点数 (偶数), 限制内存占用
+CHUNK_NODES = 65536
+
+Proof = List[Tuple[bytes, bool]]  # (兄弟节点, 兄弟是否在左侧)
+
+
+def leaf_hash(record: bytes) -> bytes:
+    return hashlib.sha256(b"\x00" + record).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+class MerkleRootBuilder:
+    """只计算根: 维护各高度的完整子树 (O(log N) 内存), 结果与逐层构建一致"""
+
+    def __init__(self):
+        self.peaks: List[Tuple[int, bytes]] = []  # (高度, 子树根), 高度递减
+        self.count = 0
+
+    def add(self, record: bytes):
+        node, height = leaf_hash(record), 0
+        while self.peaks and self.peaks[-1][0] == height:
+            node = node_hash(self.peaks.pop()[1], node)
+            height += 1
+        self.peaks.append((height, node))
+        self.count += 1
+
+    def root(self) -> bytes:
+        if not self.peaks:
+            raise ValueError("空批次")
+        node = self.peaks[-1][1]
+        for _, peak in reversed(self.peaks[:-1]):
+            node = node_hash(peak, node)
+        return node
+
+
+class MerkleBatchWriter:
+    """流式写入叶子, 逐层把整棵树写到磁盘, 之后可按下标生成包含证明
+
+    文件内容为各层节点依次排列 (第 0 层为叶子); 内存中只保存每层的起始位置
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file: BinaryIO = open(path, "w+b")
+        self.count = 0
+        self.levels: List[Tuple[int, int]] = []  # (起始节点下标, 节点数)
+        self._root: Optional[bytes] = None
+
+    def add(self, record: bytes):
+        if self.levels:
+            raise RuntimeError("批次已完成")
+        self._file.write(leaf_hash(record))
+        self.count += 1
+
+    def finalize(self) -> bytes:
+        """构建上层节点并返回根"""
+        if self._root is not None:
+            return self._root
+        if not self.count:
+            raise ValueError("空批次")
+        f = self._file
+        start, size = 0, self.count
+        self.levels.append((start, size))
+        while size > 1:
+            next_start = start + size
+            for chunk_start in range(0, size, CHUNK_NODES):
+                n = min(CHUNK_NODES, size - chunk_start)
+                f.seek((start + chunk_start) * NODE_SIZE)
+                data = f.read(n * NODE_SIZE)
+                parents = []
+                for i in range(0, n - 1, 2):
+                    parents.append(node_hash(data[i * NODE_SIZE:(i + 1) * NODE_SIZE],
+                                             data[(i + 1) * NODE_SIZE:(i + 2) * NODE_SIZE]))
+                if n % 2:
+                    parents.append(data[(n - 1) * NODE_SIZE:])
+                f.seek(0, os.SEEK_END)
+                f.write(b"".join(parents))
+            start, size = next_start, (size + 1) // 2
+            self.levels.append((start, size))
+        f.flush()
+        self._root = self._node(start)
+        return self._root
+
+    def _node(self, i: int) -> bytes:
+        self._file.seek(i * NODE_SIZE)
+        return self._file.read(NODE_SIZE)
+
+    def proof(self, index: int) -> Proof:
+        """第 index 个叶子的包含证明"""
+        self.finalize()
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        proof = []
+        for start, size in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < size:
+                proof.append((self._node(start + sibling), sibling < index))
+            index //= 2
+        return proof
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def verify_proof(record: bytes, proof: Proof, root: bytes) -> bool:
+    """本地验证包含证明 (与合约 verifyChallengeInclusion 相同的计算)"""
+    node = leaf_hash(record)
+    for sibling, sibling_is_left in proof:
+        node = node_hash(sibling, node) if sibling_is_left else node_hash(node, sibling)
+    return node == root
+
+
+def encode_proof(proof: Proof) -> dict:
+    """证明的传输/调用格式: 兄弟节点列表 + 方向位图 (第 i 位为 1 表示兄弟在左)"""
+    flags = 0
+    for i, (_, sibling_is_left) in enumerate(proof):
+        if sibling_is_left:
+            flags |= 1 << i
+    return {"siblings": ["0x" + sibling.hex() for sibling, _ in proof], "flags": flags}
+
+
+def decode_proof(data: dict) -> Proof:
+    return [(bytes.fromhex(s[2:]), bool(data["flags"] >> i & 1)) for i, s in enumerate(data["siblings"])]
+
+
+def main():
+    """构建基准: 吞吐、证明长度与验证速度"""
+    import tempfile
+    import time
+
+    n = 1000000
+    path = os.path.join(tempfile.gettempdir(), "bsc-ai-miner-merkle-bench.bin")
+    records = (hashlib.sha256(str(i).encode()).digest() for i in range(n))
+
+    print("=" * 60)
+    print(f"  Merkle 批量承诺 ({n} 条)")
+    print("=" * 60)
+    start = time.perf_counter()
+    with MerkleBatchWriter(path) as writer:
+        builder = MerkleRootBuilder()
+        for r in records:
+            writer.add(r)
+            builder.add(r)
+        root = writer.finalize()
+        elapsed = time.perf_counter() - start
+        assert root == builder.root()
+        print(f"根:       0x{root.hex()}")
+        print(f"构建:     {elapsed:.2f}s ({n / elapsed:,.0f} 条/s), 磁盘 {os.path.getsize(path) / 2 ** 20:.0f} MB")
+
+        indices = list(range(0, n, n // 1000))
+        start = time.perf_counter()
+        proofs = [writer.proof(i) for i in indices]
+        gen = (time.perf_counter() - start) / len(indices)
+        start = time.perf_counter()
+        ok = all(verify_proof(hashlib.sha256(str(i).encode()).digest(), p, root) for i, p in zip(indices, proofs))
+        check = (time.perf_counter() - start) / len(indices)
+        assert ok
+        print(f"证明:     {len(proofs[0])} 个节点, 生成 {gen * 1e6:.0f} µs, 验证 {check * 1e6:.0f} µs")
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+BSC AI Miner - 链上交易预检
+在签名和广播 mine(nonce, expiry, signature) 之前, 本地排除必然 revert 的 mineData
+
+BSCAIMiner.mine 本身不校验 signature; 只有配置了 signer 时才检查签名, 此时假定 API 按以下方式签名
+(链下约定, 合约不强制): personal_sign(keccak256(abi.encodePacked(wallet, nonce, expiry)))
+"""
+
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import requests
+
+from rate_control import parse_retry_after
+
+try:
+    from eth_account import Account
+    from eth_account.messages import encode_defunct
+    from eth_utils import keccak
+except ImportError:  # 可选依赖: 未安装时只做签名格式检查
+    Account = None
+
+# secp256k1 曲线阶, 用于检查 s 值 (EIP-2 要求 s <= n/2)
+SECP256K1_N = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+
+
+class ChainClock:
+    """与链上时间同步的时钟"""
+
+    def __init__(self, rpc_url: str, resync_interval: float = 60, timeout: float = 5, rate=None):
+        self.rpc_url = rpc_url
+        self.rate = rate  # 可选的 RPC 速率控制器
+        self.resync_interval = resync_interval
+        self.timeout = timeout
+        self.offset = 0.0  # 链上时间 - 本地时间
+        self.last_sync = None
+
+    def sync(self) -> bool:
+        """读取最新区块时间戳并更新偏移"""
+        payload = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "eth_getBlockByNumber",
+            "params": ["latest", False],
+        }
+        if self.rate:
+            self.rate.acquire()
+        sent = time.time()
+        try:
+            r = requests.post(self.rpc_url, json=payload, timeout=self.timeout)
+            received = time.time()
+            if self.rate:
+                self.rate.record(received - sent, r.status_code, parse_retry_after(r.headers.get("Retry-After")))
+            block = r.json()["result"]
+            # 以请求往返的中点作为区块时间对应的本地时刻
+            self.offset = int(block["timestamp"], 16) - (sent + received) / 2
+            self.last_sync = received
+            return True
+        except Exception as e:
+            if self.rate and isinstance(e, requests.RequestException):
+                self.rate.record(time.time() - sent, None)
+            print(f"    链上时钟同步失败: {e}")
+            # 失败后同样等待一个周期再重试, 避免每次检查都阻塞在 RPC 上
+            self.last_sync = time.time()
+            return False
+
+    def now(self) -> float:
+        """当前链上时间 (秒)"""
+        if self.last_sync is None or time.time() - self.last_sync > self.resync_interval:
+            self.sync()
+        return time.time() + self.offset
+
+
+class NonceFilter:
+    """有界的已见 nonce 集合, 超出容量时淘汰最早的记录"""
+
+    def __init__(self, capacity: int = 100000):
+        self.capacity = capacity
+        self._seen = OrderedDict()
+
+    def __contains__(self, nonce: str) -> bool:
+        return nonce.lower() in self._seen
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def __iter__(self):
+        """按加入顺序 (最早的在前) 遍历"""
+        return iter(self._seen)
+
+    def add(self, nonce: str):
+        nonce = nonce.lower()
+        self._seen[nonce] = True
+        self._seen.move_to_end(nonce)
+        while len(self._seen) > self.capacity:
+            self._seen.popitem(last=False)
+
+
+class MinePreflight:
+    """mineData 预检: 过期时间、冷却时间、签名、nonce 去重"""
+
+    def __init__(self, wallet: str, rpc_url: str, signer: Optional[str] = None,
+                 expiry_margin: float = 15, nonce_capacity: int = 100000, rpc_rate=None):
+        self.wallet = wallet
+        self.signer = signer
+        if signer and Account is None:
+            print("⚠️ 已配置 signer 但未安装 eth_account, 只检查签名格式, 不校验签名者 (pip install eth-account)")
+        # 交易从广播到打包需要时间, 剩余有效期少于该值视为过期
+        self.expiry_margin = expiry_margin
+        self.clock = ChainClock(rpc_url, rate=rpc_rate)
+        self.seen_nonces = NonceFilter(nonce_capacity)
+        # BSCAIMiner: require(block.timestamp >= lastMineTime[msg.sender] + cooldown)
+        self.cooldown = 0
+        self.last_mine = 0  # 上次挖矿的链上时间
+        self.stats = {"checked": 0, "rejected": 0}
+
+    def check(self, mine_data: Dict) -> Tuple[bool, str]:
+        """检查 mineData 是否可以提交, 返回 (是否通过, 原因)"""
+        self.stats["checked"] += 1
+        ok, reason = self._check(mine_data)
+        if not ok:
+            self.stats["rejected"] += 1
+        return ok, reason
+
+    def _check(self, mine_data: Dict) -> Tuple[bool, str]:
+        try:
+            nonce = parse_bytes32(mine_data["nonce"])
+            expiry = int(mine_data["expiry"])
+            # 合约不校验签名, 只要求是可编码的 bytes
+            signature = parse_hex(mine_data["signature"])
+        except (KeyError, TypeError, ValueError) as e:
+            return False, f"mineData 格式错误: {e}"
+
+        # 合约: require(!usedNonces[nonce])
+        if mine_data["nonce"] in self.seen_nonces:
+            return False, "nonce 已使用"
+
+        # 合约: require(block.timestamp < expiry); 冷却未结束时从冷却结束时刻算起
+        remaining = expiry - self.clock.now() - self.cooldown_remaining()
+        if remaining < self.expiry_margin:
+            return False, f"挑战已过期 (剩余 {remaining:.0f}s)"
+
+        if self.signer:
+            try:
+                check_signature_shape(signature)
+            except ValueError as e:
+                return False, f"签名格式错误: {e}"
+            recovered = recover_signer(self.wallet, nonce, expiry, signature)
+            if recovered and recovered.lower() != self.signer.lower():
+                return False, f"签名者不匹配: {recovered}"
+
+        return True, "ok"
+
+    def cooldown_remaining(self) -> float:
+        """距冷却结束的秒数 (链上时间)"""
+        if not self.cooldown:
+            return 0.0
+        return max(0.0, self.last_mine + self.cooldown - self.clock.now())
+
+    def record(self, mine_data: Dict):
+        """交易已发出后记录 nonce"""
+        self.seen_nonces.add(mine_data["nonce"])
+
+    def record_mine(self):
+        """交易成功发出后记录挖矿时间"""
+        self.last_mine = self.clock.now()
+
+
+def parse_hex(value: str) -> bytes:
+    """解析 (可选 0x 开头的) 十六进制字节串"""
+    return bytes.fromhex(value[2:] if value.startswith("0x") else value)
+
+
+def parse_bytes32(value: str) -> bytes:
+    """解析 0x 开头的 bytes32"""
+    raw = parse_hex(value)
+    if len(raw) != 32:
+        raise ValueError(f"nonce 长度 {len(raw)} != 32")
+    return raw
+
+
+def check_signature_shape(raw: bytes) -> bytes:
+    """检查 65 字节 (r, s, v) 签名; 仅在配置了 signer 时使用"""
+    if len(raw) != 65:
+        raise ValueError(f"签名长度 {len(raw)} != 65")
+    r = int.from_bytes(raw[:32], "big")
+    s = int.from_bytes(raw[32:64], "big")
+    v = raw[64]
+    if not 0 < r < SECP256K1_N or not 0 < s <= SECP256K1_N // 2:
+        raise ValueError("签名 r/s 超出范围")
+    if v not in (0, 1, 27, 28):
+        raise ValueError(f"签名 v={v} 无效")
+    return raw
+
+
+def recover_signer(wallet: str, nonce: bytes, expiry: int, signature: bytes) -> Optional[str]:
+    """恢复签名者地址: keccak256(abi.encodePacked(wallet, nonce, expiry)) 的以太坊签名消息
+
+    未安装 eth_account 或钱包地址无效时返回 None (跳过该项检查)
+    """
+    if Account is None:
+        return None
+    try:
+        digest = keccak(parse_hex(wallet) + nonce + expiry.to_bytes(32, "big"))
+    except ValueError:
+        return None
+    try:
+        return Account.recover_message(encode_defunct(primitive=digest), signature=signature)
+    except Exception:
+        return "0x0000000000000000000000000000000000000000"
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+低开销采样分析器
+按固定频率采样被标记线程的调用栈, 按挑战类型和难度分别累计, 导出火焰图用的 collapsed-stack 文件
+
+通过环境变量开启 (默认关闭, 关闭时装饰器直接返回原函数):
+    MINER_PROFILE=1          开启
+    MINER_PROFILE_HZ=10      采样频率 (每秒次数)
+    MINER_PROFILE_DIR=...    输出目录 (默认 ./profiles)
+"""
+
+import atexit
+import contextlib
+import functools
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Optional, Tuple
+
+Tag = Tuple[Optional[str], Optional[int]]
+
+
+class SamplingProfiler:
+    """后台线程定时读取 sys._current_frames(), 只采样带有标签的线程"""
+
+    def __init__(self, hz: float = 10, out_dir: str = "profiles", max_depth: int = 64,
+                 flush_interval: float = 30):
+        self.interval = 1 / hz
+        self.out_dir = out_dir
+        self.max_depth = max_depth
+        self.flush_interval = flush_interval
+        self.samples: Dict[Tag, Counter] = {}
+        self._tags: Dict[int, list] = {}  # 线程 id → 标签栈, 栈空时删除
+        self._labels = {}                 # code 对象 → 帧名
+        self._lock = threading.Lock()     # 保护 samples 与 _tags
+        self._thread = None
+        self._stopped = threading.Event()
+
+    @classmethod
+    def from_env(cls) -> Optional["SamplingProfiler"]:
+        if os.environ.get("MINER_PROFILE", "") in ("", "0"):
+            return None
+        profiler = cls(hz=float(os.environ.get("MINER_PROFILE_HZ", 10)),
+                       out_dir=os.environ.get("MINER_PROFILE_DIR", "profiles"))
+        profiler.start()
+        atexit.register(profiler.stop)
+        return profiler
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="miner-profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        self.export()
+
+    @contextlib.contextmanager
+    def tag(self, challenge_type: Optional[str] = None, difficulty: Optional[int] = None):
+        """标记当前线程正在处理的挑战; 为 None 的字段沿用外层标签"""
+        ident = threading.get_ident()
+        with self._lock:
+            stack = self._tags.setdefault(ident, [])
+            outer = stack[-1] if stack else (None, None)
+            stack.append((challenge_type or outer[0], difficulty if difficulty is not None else outer[1]))
+        try:
+            yield
+        finally:
+            with self._lock:
+                stack.pop()
+                if not stack:
+                    del self._tags[ident]
+
+    def _label(self, frame) -> str:
+        code = frame.f_code
+        label = self._labels.get(code)
+        if label is None:
+            # 用模块名而不是文件名, re/__init__.py 之类才能区分
+            label = f"{frame.f_globals.get('__name__', '?')}:{code.co_name}"
+            self._labels[code] = label
+        return label
+
+    def sample(self):
+        """采样一次所有带标签的线程"""
+        frames = sys._current_frames()
+        with self._lock:
+            tags = {ident: stack[-1] for ident, stack in self._tags.items()}
+        for ident, tag in tags.items():
+            if ident not in frames:
+                continue
+            names = []
+            frame = frames[ident]
+            while frame is not None and len(names) < self.max_depth:
+                names.append(self._label(frame))
+                frame = frame.f_back
+            collapsed = ";".join(reversed(names))
+            with self._lock:
+                self.samples.setdefault(tag, Counter())[collapsed] += 1
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while not self._stopped.wait(self.interval):
+            self.sample()
+            if time.monotonic() - last_flush > self.flush_interval:
+                self.export()
+                last_flush = time.monotonic()
+
+    def export(self) -> Dict[Tag, str]:
+        """按 (类型, 难度) 写出 collapsed-stack 文件, 返回 标签 → 文件路径"""
+        with self._lock:
+            snapshot = {tag: dict(counts) for tag, counts in self.samples.items()}
+        if not snapshot:
+            return {}
+        os.makedirs(self.out_dir, exist_ok=True)
+        paths = {}
+        for (challenge_type, difficulty), counts in snapshot.items():
+            name = re.sub(r"[^\w.-]", "_", f"{challenge_type or 'unknown'}-d{difficulty if difficulty is not None else 'x'}")
+            path = os.path.join(self.out_dir, f"{name}.folded")
+            with open(path, "w") as f:
+                for stack, count in sorted(counts.items()):
+                    f.write(f"{stack} {count}\n")
+            paths[(challenge_type, difficulty)] = path
+        return paths
+
+
+PROFILER = SamplingProfiler.from_env()
+
+
+def profile_tag(challenge_type: Optional[str] = None, difficulty: Optional[int] = None):
+    """标签上下文; 未开启时为空操作"""
+    if PROFILER is None:
+        return contextlib.nullcontext()
+    return PROFILER.tag(challenge_type, difficulty)
+
+
+def profiled(tagger: Callable[..., Tag] = lambda *args, **kwargs: (None, None)):
+    """装饰求解入口: tagger 接收同样的参数, 返回 (挑战类型, 难度)"""
+    def decorator(fn):
+        if PROFILER is None:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            challenge_type, difficulty = tagger(*args, **kwargs)
+            with PROFILER.tag(challenge_type, difficulty):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
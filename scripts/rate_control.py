@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+自适应请求速率控制 (AIMD)
+延迟与错误率正常时加性提速; 遇到 429、超时、错误率升高或 p99 上升时乘性降速; 遵守 Retry-After
+"""
+
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After (秒数或 HTTP 日期)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class AIMDController:
+    """单个端点的速率控制器"""
+
+    def __init__(self, name: str, initial_rate: float = 1.0, min_rate: float = 0.1,
+                 max_rate: float = 20.0, increase: float = 0.5, decrease: float = 0.5,
+                 window: int = 50, error_threshold: float = 0.1, p99_factor: float = 2.0):
+        self.name = name
+        self.rate = initial_rate      # 允许的请求速率 (次/秒)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase      # 满速运行时每秒提升的速率
+        self.decrease = decrease      # 降速时的乘数
+        self.error_threshold = error_threshold
+        self.p99_factor = p99_factor  # p99 超过基线的倍数时降速
+
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)  # True = 正常
+        self.baseline_p99 = None
+        self.next_slot = 0.0
+        self.blocked_until = 0.0
+        self.last_decrease = 0.0
+        self.counters = {"requests": 0, "throttled": 0, "errors": 0, "increases": 0, "decreases": 0}
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """等待下一个可用的请求时隙, 返回等待的秒数"""
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot, self.blocked_until)
+            self.next_slot = slot + 1 / self.rate
+            self.counters["requests"] += 1
+        wait = slot - now
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def record(self, latency: float, status: Optional[int] = 200, retry_after: Optional[float] = None):
+        """记录一次请求结果; status 为 None 表示超时或连接失败"""
+        with self.lock:
+            now = time.monotonic()
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+
+            if status == 429:
+                self.counters["throttled"] += 1
+                self.outcomes.append(False)
+                self._decrease(now)
+                return
+            if status is None or status >= 500:
+                self.counters["errors"] += 1
+                self.outcomes.append(False)
+                # 超时通常意味着过载, 直接降速; 5xx 按窗口错误率判断
+                if status is None or self._error_rate() > self.error_threshold:
+                    self._decrease(now)
+                return
+
+            self.outcomes.append(True)
+            self.latencies.append(latency)
+            if len(self.latencies) >= self.latencies.maxlen // 2:
+                p99 = _percentile(self.latencies, 0.99)
+                if self.baseline_p99 is None:
+                    self.baseline_p99 = p99
+                elif p99 > self.baseline_p99 * self.p99_factor:
+                    self._decrease(now)
+                    return
+                else:
+                    self.baseline_p99 = 0.9 * self.baseline_p99 + 0.1 * p99
+            if self._error_rate() <= self.error_threshold:
+                self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+                self.counters["increases"] += 1
+
+    def _error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def _decrease(self, now: float):
+        # 同一批在途请求的失败只降速一次
+        if now - self.last_decrease < max(1 / self.rate, self.baseline_p99 or 0):
+            return
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+        self.last_decrease = now
+        self.counters["decreases"] += 1
+        # 慢请求样本不再代表新的速率
+        self.latencies.clear()
+
+    def snapshot(self) -> Dict:
+        """导出控制器状态, 用于调参"""
+        with self.lock:
+            now = time.monotonic()
+            return {
+                "name": self.name,
+                "rate": round(self.rate, 3),
+                "blocked_for": round(max(0.0, self.blocked_until - now), 3),
+                "error_rate": round(self._error_rate(), 3),
+                "p50": round(_percentile(self.latencies, 0.5), 4) if self.latencies else None,
+                "p99": round(_percentile(self.latencies, 0.99), 4) if self.latencies else None,
+                "baseline_p99": round(self.baseline_p99, 4) if self.baseline_p99 else None,
+                **self.counters,
+            }
+
+
+class RateControllers:
+    """按端点名管理控制器"""
+
+    def __init__(self, **defaults):
+        self.defaults = defaults
+        self.controllers = {}
+
+    def __getitem__(self, name: str) -> AIMDController:
+        if name not in self.controllers:
+            self.controllers[name] = AIMDController(name, **self.defaults.get(name, {}))
+        return self.controllers[name]
+
+    def snapshot(self) -> Dict[str, Dict]:
+        return {name: c.snapshot() for name, c in self.controllers.items()}
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+安全算术求值器
+优先级爬升解析, 整数/有理数精确计算, 支持 × ÷ ^ ² ³ √, 解析结果按规范化文本缓存
+"""
+
+import math
+import re
+from fractions import Fraction
+from functools import lru_cache
+from typing import Iterable, List, Optional, Union
+
+Number = Union[int, Fraction]
+
+# 规范化: Unicode 运算符 → ASCII
+_NORMALIZE = str.maketrans({"×": "*", "·": "*", "÷": "/", "−": "-", "（": "(", "）": ")"})
+
+# 二元运算符: (优先级, 是否右结合)
+_BINARY = {"+": (1, False), "-": (1, False), "*": (2, False), "/": (2, False), "^": (3, True)}
+_POW_PREC = 3
+_POSTFIX = {"²": 2, "³": 3}
+
+_TOKEN = re.compile(r"\d+(?:\.\d+)?|[-+*/^()²³√]")
+# 文本中可能构成算式的片段; "." 只作为数字间的小数点, 句末句号不计入
+_CANDIDATE = re.compile(r"(?:\d\.(?=\d)|[\d\s+\-−*/×÷·^()（）²³√])+")
+_OPERATOR = re.compile(r"[+\-−*/×÷·^²³√]")
+
+# 防止 2^99999999 之类的输入耗尽资源
+MAX_RESULT_BITS = 4096
+
+
+class EvalError(ValueError):
+    """表达式无法解析或无法精确求值"""
+
+
+def normalize(expr: str) -> str:
+    """去空白并统一运算符写法"""
+    return "".join(expr.translate(_NORMALIZE).split()).replace("**", "^")
+
+
+@lru_cache(maxsize=4096)
+def parse(normalized: str) -> tuple:
+    """解析规范化后的表达式为语法树 (嵌套 tuple)"""
+    tokens = _TOKEN.findall(normalized)
+    if "".join(tokens) != normalized:
+        raise EvalError(f"非法字符: {normalized!r}")
+    parser = _Parser(tokens)
+    node = parser.expression(1)
+    if parser.pos != len(tokens):
+        raise EvalError(f"多余的符号: {tokens[parser.pos]!r}")
+    return node
+
+
+class _Parser:
+    """优先级爬升解析器"""
+
+    def __init__(self, tokens: List[str]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self) -> str:
+        token = self.peek()
+        if token is None:
+            raise EvalError("表达式不完整")
+        self.pos += 1
+        return token
+
+    def expression(self, min_prec: int) -> tuple:
+        lhs = self.unary()
+        while True:
+            op = self.peek()
+            if op not in _BINARY:
+                return lhs
+            prec, right_assoc = _BINARY[op]
+            if prec < min_prec:
+                return lhs
+            self.pos += 1
+            rhs = self.expression(prec if right_assoc else prec + 1)
+            lhs = (op, lhs, rhs)
+
+    def unary(self) -> tuple:
+        token = self.peek()
+        if token == "-":
+            # -2^2 = -(2^2)
+            self.pos += 1
+            return ("neg", self.expression(_POW_PREC))
+        if token == "+":
+            self.pos += 1
+            return self.expression(_POW_PREC)
+        if token == "√":
+            self.pos += 1
+            return ("sqrt", self.unary())
+        return self.postfix()
+
+    def postfix(self) -> tuple:
+        node = self.primary()
+        while self.peek() in _POSTFIX:
+            node = ("^", node, ("num", _POSTFIX[self.take()]))
+        return node
+
+    def primary(self) -> tuple:
+        token = self.take()
+        if token == "(":
+            node = self.expression(1)
+            if self.take() != ")":
+                raise EvalError("括号不匹配")
+            return node
+        if token[0].isdigit():
+            value = Fraction(token) if "." in token else int(token)
+            return ("num", value)
+        raise EvalError(f"意外的符号: {token!r}")
+
+
+def _eval(node: tuple) -> Number:
+    op = node[0]
+    if op == "num":
+        return node[1]
+    if op == "neg":
+        return -_eval(node[1])
+    if op == "sqrt":
+        return _sqrt(_eval(node[1]))
+    a = _eval(node[1])
+    b = _eval(node[2])
+    if op == "+":
+        return a + b
+    if op == "-":
+        return a - b
+    if op == "*":
+        return a * b
+    if op == "/":
+        if b == 0:
+            raise EvalError("除数为 0")
+        if isinstance(a, int) and isinstance(b, int) and a % b == 0:
+            return a // b
+        result = Fraction(a) / b
+        return result.numerator if result.denominator == 1 else result
+    return _pow(a, b)
+
+
+def _pow(base: Number, exp: Number) -> Number:
+    if not isinstance(exp, int):
+        if exp.denominator != 1:
+            raise EvalError("不支持非整数指数")
+        exp = exp.numerator
+    magnitude = abs(base.numerator if isinstance(base, Fraction) else base)
+    if magnitude > 1 and magnitude.bit_length() * abs(exp) > MAX_RESULT_BITS:
+        raise EvalError("结果过大")
+    if exp < 0:
+        if base == 0:
+            raise EvalError("除数为 0")
+        return Fraction(base) ** exp
+    return base ** exp
+
+
+def _sqrt(value: Number) -> Number:
+    if value < 0:
+        raise EvalError("负数开方")
+    if isinstance(value, int):
+        root = math.isqrt(value)
+        if root * root == value:
+            return root
+    else:
+        num, den = math.isqrt(value.numerator), math.isqrt(value.denominator)
+        if num * num == value.numerator and den * den == value.denominator:
+            return Fraction(num, den)
+    raise EvalError(f"√{value} 不是有理数")
+
+
+def evaluate(expr: str) -> Number:
+    """精确求值算术表达式"""
+    return _eval(parse(normalize(expr)))
+
+
+def evaluate_many(expressions: Iterable[str], default=None) -> List[Optional[Number]]:
+    """批量求值, 无法求值的表达式返回 default"""
+    results = []
+    for expr in expressions:
+        try:
+            results.append(_eval(parse(normalize(expr))))
+        except (EvalError, ZeroDivisionError):
+            results.append(default)
+    return results
+
+
+def _is_operation(node: tuple) -> bool:
+    """至少包含一个二元运算、开方或幂; 单独的 (带符号) 数字不算算式"""
+    while node[0] == "neg":
+        node = node[1]
+    return node[0] != "num"
+
+
+def evaluate_in_text(text: str) -> Optional[Number]:
+    """从题目文本中找出第一个可求值的算式并求值
+
+    "-3, -1, 1" 中的 "-3" 或 "2x + 3y" 中的 "+ 3" 只是带符号的数字, 不视为算式
+    """
+    for match in _CANDIDATE.finditer(text):
+        candidate = match.group().strip()
+        if not _OPERATOR.search(candidate) or not any(c.isdigit() for c in candidate):
+            continue
+        # 片段边缘可能带着题目中的括号, 例如 "(1-indexed) 3+4"
+        for expr in (candidate, candidate.strip("()（） ")):
+            try:
+                node = parse(normalize(expr))
+                if _is_operation(node):
+                    return _eval(node)
+            except (EvalError, ZeroDivisionError):
+                continue
+    return None
+
+
+def format_number(value: Number) -> str:
+    """整数输出为十进制, 其余输出为最简分数 a/b"""
+    if isinstance(value, Fraction) and value.denominator == 1:
+        return str(value.numerator)
+    return str(value)
+
+
+def main():
+    """与 eval() 的对比基准"""
+    import random
+    import time
+
+    random.seed(578)
+    corpus = []
+    for _ in range(2000):
+        a, b, c = random.randint(100, 999), random.randint(2, 30), random.randint(2, 5)
+        corpus.extend([
+            f"{a} + {b}",
+            f"{a} - {b}",
+            f"{b} × {c}",
+            f"{a} + {b} × {c}",
+            f"({a} - {b}) / {c}",
+            f"{c}^{c}",
+        ])
+    # eval 只认识 ASCII 运算符
+    python_corpus = [e.replace("×", "*").replace("^", "**") for e in corpus]
+
+    for expr, py in zip(corpus[:60], python_corpus[:60]):
+        assert Fraction(eval(py)).limit_denominator() == evaluate(expr), expr
+
+    def bench(workload):
+        """依次用 eval() 和 safe_eval 求值 workload 中的下标, 返回 (eval 秒数, safe_eval 秒数, 缓存命中率)"""
+        start = time.perf_counter()
+        for i in workload:
+            eval(python_corpus[i])
+        eval_time = time.perf_counter() - start
+        parse.cache_clear()
+        start = time.perf_counter()
+        evaluate_many(corpus[i] for i in workload)
+        safe_time = time.perf_counter() - start
+        info = parse.cache_info()
+        return eval_time, safe_time, info.hits / max(1, info.hits + info.misses)
+
+    # 冷启动: 每条表达式只出现一次, 缓存无用, 比较的是解析器本身
+    # 重复题目: 从不超过缓存容量的题库中反复抽题, 接近矿工实际遇到的重复出题
+    random.seed(36)
+    distinct = list({expr: i for i, expr in enumerate(corpus)}.values())
+    bank = random.sample(distinct, min(len(distinct), parse.cache_info().maxsize // 2))
+    workloads = {
+        "冷启动": distinct,
+        "重复题目": [random.choice(bank) for _ in range(3 * len(corpus))],
+    }
+
+    print("=" * 60)
+    print(f"  算术求值基准 (缓存容量 {parse.cache_info().maxsize})")
+    print("=" * 60)
+    for name, workload in workloads.items():
+        eval_time, safe_time, hit_rate = bench(workload)
+        n = len(workload)
+        print(f"{name} ({n} 条, {len(set(workload))} 条不同, 缓存命中率 {hit_rate:.0%}):")
+        print(f"  eval():     {eval_time / n * 1e6:.2f} µs/条")
+        print(f"  safe_eval:  {safe_time / n * 1e6:.2f} µs/条 (eval 的 {eval_time / safe_time:.2f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+按文件名加载 scripts/ 下的脚本模块 (文件名含 "-", 无法直接 import)
+"""
+
+import importlib.util
+import os
+import sys
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 脚本之间按模块名互相导入 (如 safe_eval)
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+
+def load_script(filename: str):
+    """加载 scripts/<filename> 并缓存到 sys.modules"""
+    name = os.path.splitext(filename)[0].replace("-", "_")
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, os.path.join(SCRIPTS_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
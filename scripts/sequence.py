@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+序列预测引擎
+依次尝试: 有限差分 (多项式序列) → Berlekamp–Massey 最短线性递推 (有理数域精确计算) → 已知常数序列前缀索引
+"""
+
+import re
+from fractions import Fraction
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+# 已知序列的索引窗口长度, 观测序列至少要有这么多项才会查索引
+WINDOW = 4
+# 已知序列预计算的项数
+KNOWN_TERMS = 60
+# 求解器采用预测结果的最低置信度 (至少有一项额外数据验证)
+MIN_CONFIDENCE = 0.5
+
+_SEQUENCE = re.compile(r"-?\d+(?:\s*,\s*-?\d+){2,}")
+
+
+class Prediction(NamedTuple):
+    value: int
+    method: str
+    confidence: float
+
+
+def _verified(extra: int) -> float:
+    """拟合所需项数之外还有 extra 项数据验证时的置信度"""
+    return 1 - 0.5 ** extra
+
+
+def finite_difference(seq: Sequence[int]) -> Optional[Tuple[int, int]]:
+    """差分表: 若序列是 d 次多项式且至少多一项验证, 返回 (下一项, d)"""
+    rows = [list(seq)]
+    while len(rows[-1]) > 1 and any(x != rows[-1][0] for x in rows[-1]):
+        prev = rows[-1]
+        rows.append([prev[i + 1] - prev[i] for i in range(len(prev) - 1)])
+    degree = len(rows) - 1
+    # 最后一行只剩一项时任何序列都能"拟合", 没有验证意义
+    if len(rows[-1]) < 2:
+        return None
+    value = 0
+    for row in rows:
+        value += row[-1]
+    return value, degree
+
+
+def berlekamp_massey(seq: Sequence[int]) -> List[Fraction]:
+    """有理数域上的 Berlekamp–Massey, 返回连接多项式系数 C (C[0] = 1)
+
+    满足 sum(C[i] * s[n-i] for i in 0..L) = 0
+    """
+    c = [Fraction(1)]
+    b = [Fraction(1)]
+    length, shift, last = 0, 1, Fraction(1)
+    for n, s in enumerate(seq):
+        d = Fraction(s)
+        for i in range(1, length + 1):
+            d += c[i] * seq[n - i]
+        if d == 0:
+            shift += 1
+            continue
+        coef = d / last
+        updated = c + [Fraction(0)] * max(0, len(b) + shift - len(c))
+        for i, x in enumerate(b):
+            updated[i + shift] -= coef * x
+        if 2 * length <= n:
+            b, last, length, shift = c, d, n + 1 - length, 1
+        else:
+            shift += 1
+        c = updated
+    return c[:length + 1] + [Fraction(0)] * (length + 1 - len(c))
+
+
+def linear_recurrence(seq: Sequence[int]) -> Optional[Tuple[Fraction, int]]:
+    """最短线性递推: 若递推阶数 L 满足 n >= 2L + 1, 返回 (下一项, L)"""
+    c = berlekamp_massey(seq)
+    order = len(c) - 1
+    if len(seq) < 2 * order + 1:
+        return None
+    value = -sum(c[i] * seq[len(seq) - i] for i in range(1, order + 1))
+    return value, order
+
+
+def _pi_digits(n: int) -> List[int]:
+    """Machin 公式整数运算求 π 的前 n 位"""
+    scale = 10 ** (n + 10)
+
+    def arctan_inv(x: int) -> int:
+        total = term = scale // x
+        k, sign = 1, 1
+        while term:
+            term //= x * x
+            k += 2
+            sign = -sign
+            total += sign * (term // k)
+        return total
+
+    pi = 4 * (4 * arctan_inv(5) - arctan_inv(239))
+    return [int(d) for d in str(pi // 10 ** 10)[:n]]
+
+
+def _e_digits(n: int) -> List[int]:
+    """级数求 e 的前 n 位"""
+    scale = 10 ** (n + 10)
+    total, term, k = 0, scale, 0
+    while term:
+        total += term
+        k += 1
+        term //= k
+    return [int(d) for d in str(total // 10 ** 10)[:n]]
+
+
+def _primes(n: int) -> List[int]:
+    primes = []
+    candidate = 2
+    while len(primes) < n:
+        if all(candidate % p for p in primes if p * p <= candidate):
+            primes.append(candidate)
+        candidate += 1
+    return primes
+
+
+def _factorials(n: int) -> List[int]:
+    out, x = [], 1
+    for i in range(1, n + 1):
+        out.append(x)
+        x *= i
+    return out
+
+
+KNOWN_SEQUENCES: Dict[str, List[int]] = {
+    "pi": _pi_digits(KNOWN_TERMS),
+    "e": _e_digits(KNOWN_TERMS),
+    "primes": _primes(KNOWN_TERMS),
+    "factorial": _factorials(KNOWN_TERMS),
+}
+
+
+def _build_prefix_index(sequences: Dict[str, List[int]]) -> Dict[tuple, List[Tuple[str, int]]]:
+    """窗口 → [(序列名, 起始位置)]"""
+    index = {}
+    for name, terms in sequences.items():
+        for start in range(len(terms) - WINDOW):
+            index.setdefault(tuple(terms[start:start + WINDOW]), []).append((name, start))
+    return index
+
+
+_PREFIX_INDEX = _build_prefix_index(KNOWN_SEQUENCES)
+
+
+def known_sequence(seq: Sequence[int]) -> Optional[Tuple[int, str]]:
+    """在已知序列中查找观测序列, 返回 (下一项, 序列名)"""
+    if len(seq) < WINDOW:
+        return None
+    for name, start in _PREFIX_INDEX.get(tuple(seq[:WINDOW]), ()):
+        terms = KNOWN_SEQUENCES[name]
+        end = start + len(seq)
+        if end < len(terms) and terms[start:end] == list(seq):
+            return terms[end], name
+    return None
+
+
+def predict_next(seq: Sequence[int]) -> Optional[Prediction]:
+    """预测下一项, 取置信度最高的方法 (同分时按尝试顺序)"""
+    seq = list(seq)
+    if len(seq) < 3:
+        return None
+    candidates = []
+
+    poly = finite_difference(seq)
+    if poly:
+        value, degree = poly
+        candidates.append(Prediction(value, f"polynomial(d={degree})", _verified(len(seq) - degree - 1)))
+
+    recurrence = linear_recurrence(seq)
+    if recurrence:
+        value, order = recurrence
+        if value.denominator == 1:
+            candidates.append(Prediction(value.numerator, f"recurrence(L={order})",
+                                         _verified(len(seq) - 2 * order)))
+
+    known = known_sequence(seq)
+    if known:
+        value, name = known
+        candidates.append(Prediction(value, f"known({name})", _verified(len(seq) - WINDOW + 1)))
+
+    if not candidates:
+        return None
+    return max(candidates, key=lambda p: p.confidence)
+
+
+def predict_many(seqs: Iterable[Sequence[int]]) -> List[Optional[Prediction]]:
+    """批量预测"""
+    return [predict_next(seq) for seq in seqs]
+
+
+def extract_sequence(text: str) -> Optional[List[int]]:
+    """从题目文本中取出最长的逗号分隔整数序列 (至少 3 项)"""
+    runs = _SEQUENCE.findall(text)
+    if not runs:
+        return None
+    longest = max(runs, key=len)
+    return [int(x) for x in longest.split(",")]
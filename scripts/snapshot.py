@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+矿工热状态快照
+定期把统计、账户 nonce、冷却时间、答案缓存、已见 mineData nonce 等写成 zlib 压缩的 JSON,
+重启时读回以减少冷启动后的吞吐下降; 链上相关字段由调用方在恢复后与链上状态核对
+"""
+
+import json
+import os
+import struct
+import time
+import zlib
+from typing import Dict, Optional
+
+# 文件头: magic, 版本, 保存时间 (unix 秒)
+HEADER = struct.Struct("<4sBd")
+MAGIC = b"BAIS"
+VERSION = 1
+
+
+def encode_snapshot(state: Dict, saved_at: Optional[float] = None) -> bytes:
+    body = json.dumps(state, separators=(",", ":"), ensure_ascii=False).encode()
+    return HEADER.pack(MAGIC, VERSION, time.time() if saved_at is None else saved_at) + zlib.compress(body, 6)
+
+
+def decode_snapshot(data: bytes) -> Dict:
+    """解码快照, 返回状态 (附带 saved_at 字段); 格式不符时抛出 ValueError"""
+    if len(data) < HEADER.size:
+        raise ValueError("快照过短")
+    magic, version, saved_at = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"不支持的快照格式: {magic!r} v{version}")
+    try:
+        state = json.loads(zlib.decompress(data[HEADER.size:]))
+    except (zlib.error, ValueError) as e:
+        raise ValueError(f"快照已损坏: {e}")
+    state["saved_at"] = saved_at
+    return state
+
+
+def save_snapshot(path: str, state: Dict) -> int:
+    """原子写入 (先写临时文件再替换, 崩溃时不会留下半个快照), 返回字节数"""
+    data = encode_snapshot(state)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return len(data)
+
+
+def load_snapshot(path: str, max_age: Optional[float] = None) -> Optional[Dict]:
+    """读取快照; 文件不存在、损坏或早于 max_age 秒时返回 None"""
+    try:
+        with open(path, "rb") as f:
+            state = decode_snapshot(f.read())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"⚠️ 忽略快照 {path}: {e}")
+        return None
+    if max_age is not None and time.time() - state["saved_at"] > max_age:
+        return None
+    return state
+
+
+class Checkpointer:
+    """按固定间隔保存快照"""
+
+    def __init__(self, path: str, interval: float = 60):
+        self.path = path
+        self.interval = interval
+        self.last_save = time.monotonic()
+        self.saves = 0
+
+    def due(self) -> bool:
+        return time.monotonic() - self.last_save >= self.interval
+
+    def save(self, state: Dict) -> Optional[int]:
+        """保存并重置计时; 写入失败只打印警告 (快照只是加速手段, 不影响挖矿)"""
+        self.last_save = time.monotonic()
+        try:
+            size = save_snapshot(self.path, state)
+        except OSError as e:
+            print(f"⚠️ 快照保存失败: {e}")
+            return None
+        self.saves += 1
+        return size